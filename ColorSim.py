@@ -9,11 +9,11 @@ Ensures WCAG AAA compliance (7:1 contrast ratio) for all color pairs.
 import argparse
 import sys
 import re
+from functools import lru_cache
 from pathlib import Path
 
 from PIL import Image, ImageFilter
-from colorthief import ColorThief
-import colorsys
+from colorthief import MMCQ
 
 
 CORE_ROLES = ["Primary", "Secondary", "Success", "Info", "Warning", "Danger", "Light", "Dark"]
@@ -30,6 +30,21 @@ STATUS_ROLE_CATEGORIES = {
     "Danger": "red",
 }
 
+# Role/component bases recognised in CTBS variable names, in match priority order.
+CTBS_BASES = (
+    "Primary", "Secondary", "Success", "Info", "Warning", "Danger", "Light", "Dark",
+    "Gray", "Body", "Border", "Emphasis", "Link", "Form", "Btn", "Table", "Alert",
+    "Badge", "Navbar", "Nav", "ListGroupItem", "Dropdown", "Card", "Modal", "Toast",
+    "Offcanvas", "Blue", "Indigo", "Purple", "Pink", "Red", "Orange", "Yellow",
+    "Green", "Teal", "Cyan",
+)
+# Zero-width lookahead so overlapping bases are all reported; at each position
+# the alternation yields the highest-priority base starting there.
+_CTBS_BASE_RE = re.compile("(?=(" + "|".join(CTBS_BASES) + "))")
+_CTBS_ALPHA_RE = re.compile(r"Alpha(\d+)")
+_CTBS_GRAY_RE = re.compile(r"Gray(\d+)")
+_CTBS_VAR_RE = re.compile(r"--CTBS-[a-zA-Z0-9-]*")
+
 
 def hex_to_rgb(hex_color: str) -> tuple[int, int, int]:
     hex_color = hex_color.lstrip('#')
@@ -37,47 +52,116 @@ def hex_to_rgb(hex_color: str) -> tuple[int, int, int]:
     return (rgb[0], rgb[1], rgb[2])
 
 
+# Channels must already be ints in 0..255 (quantize_palette clamps its output):
+# a negative index would silently wrap to the other end of the table.
+_HEX_BYTE = tuple(f"{i:02x}" for i in range(256))
+
+
 def rgb_to_hex(rgb: tuple[int, int, int]) -> str:
-    return '#{:02x}{:02x}{:02x}'.format(*rgb)
+    return "#" + _HEX_BYTE[rgb[0]] + _HEX_BYTE[rgb[1]] + _HEX_BYTE[rgb[2]]
 
 
+@lru_cache(maxsize=4096)
 def rgb_to_hsl(rgb: tuple[int, int, int]) -> tuple[float, float, float]:
-    r, g, b = [x / 255.0 for x in rgb]
-    h, l, s = colorsys.rgb_to_hls(r, g, b)
+    # Inlined colorsys.rgb_to_hls (same operation order, so identical floats)
+    r, g, b = rgb[0] / 255.0, rgb[1] / 255.0, rgb[2] / 255.0
+    maxc = max(r, g, b)
+    minc = min(r, g, b)
+    sumc = maxc + minc
+    rangec = maxc - minc
+    l = sumc / 2.0
+    if minc == maxc:
+        return (0.0, 0.0, l * 100)
+    if l <= 0.5:
+        s = rangec / sumc
+    else:
+        s = rangec / (2.0 - maxc - minc)
+    rc = (maxc - r) / rangec
+    gc = (maxc - g) / rangec
+    bc = (maxc - b) / rangec
+    if r == maxc:
+        h = bc - gc
+    elif g == maxc:
+        h = 2.0 + rc - bc
+    else:
+        h = 4.0 + gc - rc
+    h = (h / 6.0) % 1.0
     return (h * 360, s * 100, l * 100)
 
 
+@lru_cache(maxsize=4096)
 def hsl_to_rgb(hsl: tuple[float, float, float]) -> tuple[int, int, int]:
+    # Inlined colorsys.hls_to_rgb (same operation order, so identical floats)
     h, s, l = hsl
     h = h / 360.0
     s = s / 100.0
     l = l / 100.0
-    r, g, b = colorsys.hls_to_rgb(h, l, s)
-    return (int(r * 255), int(g * 255), int(b * 255))
+    if s == 0.0:
+        v = int(l * 255)
+        return (v, v, v)
+    if l <= 0.5:
+        m2 = l * (1.0 + s)
+    else:
+        m2 = l + s - (l * s)
+    m1 = 2.0 * l - m2
+    return (
+        int(_hue_channel(m1, m2, h + 1.0 / 3.0) * 255),
+        int(_hue_channel(m1, m2, h) * 255),
+        int(_hue_channel(m1, m2, h - 1.0 / 3.0) * 255),
+    )
+
+
+def _hue_channel(m1: float, m2: float, hue: float) -> float:
+    hue = hue % 1.0
+    if hue < 1.0 / 6.0:
+        return m1 + (m2 - m1) * hue * 6.0
+    if hue < 0.5:
+        return m2
+    if hue < 2.0 / 3.0:
+        return m1 + (m2 - m1) * (2.0 / 3.0 - hue) * 6.0
+    return m1
+
+
+# Linearized sRGB value for each 8-bit channel value (WCAG relative luminance).
+# Same precondition as _HEX_BYTE: channels are ints in 0..255.
+_SRGB_TO_LINEAR = tuple(
+    v / 12.92 if v <= 0.03928 else ((v + 0.055) / 1.055) ** 2.4
+    for v in (i / 255.0 for i in range(256))
+)
 
 
 def get_luminance(rgb: tuple[int, int, int]) -> float:
-    r, g, b = [x / 255.0 for x in rgb]
-    r = r / 12.92 if r <= 0.03928 else ((r + 0.055) / 1.055) ** 2.4
-    g = g / 12.92 if g <= 0.03928 else ((g + 0.055) / 1.055) ** 2.4
-    b = b / 12.92 if b <= 0.03928 else ((b + 0.055) / 1.055) ** 2.4
-    return 0.2126 * r + 0.7152 * g + 0.0722 * b
+    r, g, b = rgb
+    return 0.2126 * _SRGB_TO_LINEAR[r] + 0.7152 * _SRGB_TO_LINEAR[g] + 0.0722 * _SRGB_TO_LINEAR[b]
 
 
-def contrast_ratio(c1: tuple[int, int, int], c2: tuple[int, int, int]) -> float:
-    l1, l2 = get_luminance(c1), get_luminance(c2)
-    lighter, darker = max(l1, l2), min(l1, l2)
+WHITE_LUMINANCE = get_luminance((255, 255, 255))
+BLACK_LUMINANCE = get_luminance((0, 0, 0))
+
+
+def contrast_ratio_from_lum(l1: float, l2: float) -> float:
+    """WCAG contrast ratio of two relative luminances (for callers that reuse one)."""
+    lighter, darker = (l1, l2) if l1 > l2 else (l2, l1)
     return (lighter + 0.05) / (darker + 0.05)
 
 
-def darken(rgb: tuple[int, int, int], amount: float) -> tuple[int, int, int]:
+def contrast_ratio(c1: tuple[int, int, int], c2: tuple[int, int, int]) -> float:
+    return contrast_ratio_from_lum(get_luminance(c1), get_luminance(c2))
+
+
+@lru_cache(maxsize=4096)
+def shift_lightness(rgb: tuple[int, int, int], delta: float) -> tuple[int, int, int]:
+    """Move HSL lightness by `delta` points (negative darkens), clamped to 0-100."""
     h, s, l = rgb_to_hsl(rgb)
-    return hsl_to_rgb((h, s, max(0, l - amount)))
+    return hsl_to_rgb((h, s, max(0, min(100, l + delta))))
+
+
+def darken(rgb: tuple[int, int, int], amount: float) -> tuple[int, int, int]:
+    return shift_lightness(rgb, -amount)
 
 
 def lighten(rgb: tuple[int, int, int], amount: float) -> tuple[int, int, int]:
-    h, s, l = rgb_to_hsl(rgb)
-    return hsl_to_rgb((h, s, min(100, l + amount)))
+    return shift_lightness(rgb, amount)
 
 
 def saturate(rgb: tuple[int, int, int], amount: float) -> tuple[int, int, int]:
@@ -85,7 +169,51 @@ def saturate(rgb: tuple[int, int, int], amount: float) -> tuple[int, int, int]:
     return hsl_to_rgb((h, max(0, min(100, s + amount)), l))
 
 
+# Hue sectors as (category, upper bound in 15-degree units): red < 15deg,
+# orange < 45deg, ... pink < 345deg, then red again.
+HUE_SECTORS = (
+    ("red", 1), ("orange", 3), ("yellow", 5), ("green", 10),
+    ("cyan", 13), ("blue", 17), ("purple", 19), ("pink", 23),
+)
+_HUE_SECTOR_BOUNDS = frozenset(bound for _, bound in HUE_SECTORS)
+
+
+@lru_cache(maxsize=4096)
 def categorize_by_hue(rgb: tuple[int, int, int]) -> str:
+    """Hue category of an RGB colour, or "neutral" below 15% HSL saturation.
+
+    Works on integer chroma: hue/15deg is q/c and saturation is compared as a
+    cross-multiplication. Colours exactly on a boundary go through the float
+    HSL path, so rounding there matches _categorize_by_hsl().
+    """
+    r, g, b = rgb
+    maxc = max(r, g, b)
+    minc = min(r, g, b)
+    c = maxc - minc
+    if c == 0:
+        return "neutral"
+    sumc = maxc + minc
+    # sign of (saturation - 15%): s = c / sumc, or c / (510 - sumc) above mid lightness
+    sat = 20 * c - 3 * (sumc if sumc <= 255 else 510 - sumc)
+    if r == maxc:
+        q = 4 * (g - b)
+    elif g == maxc:
+        q = 4 * (b - r) + 8 * c
+    else:
+        q = 4 * (r - g) + 16 * c
+    if q < 0:
+        q += 24 * c
+    if sat == 0 or (q % c == 0 and q // c in _HUE_SECTOR_BOUNDS):
+        return _categorize_by_hsl(rgb)
+    if sat < 0:
+        return "neutral"
+    for category, bound in HUE_SECTORS:
+        if q < bound * c:
+            return category
+    return "red"
+
+
+def _categorize_by_hsl(rgb: tuple[int, int, int]) -> str:
     h, s, l = rgb_to_hsl(rgb)
     if s < 15:
         return "neutral"
@@ -107,20 +235,14 @@ def categorize_by_hue(rgb: tuple[int, int, int]) -> str:
         return "pink"
 
 
-def find_color_by_category(colors: list, category: str) -> tuple[int, int, int] | None:
-    for rgb in colors:
-        if categorize_by_hue(rgb) == category:
-            return rgb
-    return None
-
-
 def ensure_contrast(bg: tuple[int, int, int], target_ratio: float = 7.0) -> tuple[int, int, int]:
     """Return black or white, whichever gives better contrast."""
     white = (255, 255, 255)
     black = (0, 0, 0)
     
-    white_contrast = contrast_ratio(bg, white)
-    black_contrast = contrast_ratio(bg, black)
+    bg_lum = get_luminance(bg)
+    white_contrast = contrast_ratio_from_lum(bg_lum, WHITE_LUMINANCE)
+    black_contrast = contrast_ratio_from_lum(bg_lum, BLACK_LUMINANCE)
     
     # Return whichever meets the target, preferring the higher one
     if white_contrast >= target_ratio and white_contrast >= black_contrast:
@@ -129,7 +251,6 @@ def ensure_contrast(bg: tuple[int, int, int], target_ratio: float = 7.0) -> tupl
         return black
     
     # If neither meets target, darken or lighten the bg
-    bg_lum = get_luminance(bg)
     if bg_lum > 0.5:
         # Light bg, need darker
         return black
@@ -137,6 +258,7 @@ def ensure_contrast(bg: tuple[int, int, int], target_ratio: float = 7.0) -> tupl
         return white
 
 
+@lru_cache(maxsize=4096)
 def ensure_contrast_ratio(text_rgb: tuple[int, int, int], bg_rgb: tuple[int, int, int], target: float = 7.0) -> tuple[int, int, int]:
     """Adjust text_rgb lightness (then saturation) until it meets target contrast ratio against bg_rgb.
 
@@ -145,6 +267,9 @@ def ensure_contrast_ratio(text_rgb: tuple[int, int, int], bg_rgb: tuple[int, int
     2. If that fails, progressively reduce saturation and re-sweep lightness.
        This preserves hue while giving more contrast headroom.
     3. Fall back to black/white only as a last resort.
+
+    Memoized: theme generation asks for the same (role, body bg, target) for many
+    CTBS variables, so a fallback warning is only reported once per pair.
     """
     target_with_buffer = target + 0.1
 
@@ -155,43 +280,71 @@ def ensure_contrast_ratio(text_rgb: tuple[int, int, int], bg_rgb: tuple[int, int
     h, s, l = rgb_to_hsl(text_rgb)
     bg_lum = get_luminance(bg_rgb)
 
-    # Prefer direction based on background luminance
-    if bg_lum > 0.5:
-        search_range = list(range(int(l), -1, -1)) + list(range(int(l), 101))
-    else:
-        search_range = list(range(int(l), 101)) + list(range(int(l), -1, -1))
+    white = (255, 255, 255)
+    black = (0, 0, 0)
+    w_ratio = contrast_ratio_from_lum(WHITE_LUMINANCE, bg_lum)
+    b_ratio = contrast_ratio_from_lum(BLACK_LUMINANCE, bg_lum)
 
-    # Pass 1: sweep lightness at current saturation
     best_rgb = text_rgb
     max_contrast = current_ratio
+    sat_steps = (1.0, 0.75, 0.50, 0.25, 0.0)
+    if max(w_ratio, b_ratio) < target_with_buffer:
+        # Nothing out-contrasts pure black or white, so no sweep can reach the
+        # target either (mid-luminance backgrounds): go straight to the fallback.
+        sat_steps = ()
+        best_rgb, max_contrast = (white, w_ratio) if w_ratio >= b_ratio else (black, b_ratio)
 
-    for new_l in search_range:
-        c = hsl_to_rgb((h, s, new_l))
-        ratio = contrast_ratio(c, bg_rgb)
+    # Prefer direction based on background luminance
+    start = int(l)
+    near_target = current_ratio >= target - 0.5
+    ends = (0, 100) if bg_lum > 0.5 else (100, 0)
+
+    def candidate(sat, new_l):
+        c = hsl_to_rgb((h, sat, new_l))
+        return c, contrast_ratio_from_lum(get_luminance(c), bg_lum)
+
+    # Pass 1 sweeps lightness at the current saturation (step 1.0); pass 2
+    # progressively reduces saturation (preserves hue, widens contrast range).
+    # Luminance is monotone in lightness, so once the starting lightness fails
+    # the ratio only rises towards a passing end: bisect for the smallest
+    # lightness change instead of walking every step. The most contrasting
+    # candidate is always an end (black or white), so only those are tracked.
+    for sat_step in sat_steps:
+        reduced_s = s * sat_step
+        c, ratio = candidate(reduced_s, start)
         if ratio >= target_with_buffer:
             return c
-        if ratio > max_contrast:
-            max_contrast = ratio
-            best_rgb = c
-
-    # Pass 2: progressively reduce saturation (preserves hue, widens contrast range)
-    for sat_step in (0.75, 0.50, 0.25, 0.0):
-        reduced_s = s * sat_step
-        for new_l in search_range:
-            c = hsl_to_rgb((h, reduced_s, new_l))
-            ratio = contrast_ratio(c, bg_rgb)
-            if ratio >= target_with_buffer:
-                return c
-            if ratio > max_contrast:
-                max_contrast = ratio
-                best_rgb = c
+        for end in ends:
+            passing = None
+            failing = start
+            if near_target and end == ends[0]:
+                # Almost passing already: a small nudge usually suffices, which
+                # narrows the bisection to a few steps. A failed nudge still
+                # narrows it, as the new failing bound.
+                nudge = max(0, min(100, start + (3 if end > start else -3)))
+                nudge_c, ratio = candidate(reduced_s, nudge)
+                if ratio >= target_with_buffer:
+                    passing, c = nudge, nudge_c
+                else:
+                    failing = nudge
+            if passing is None:
+                c, ratio = candidate(reduced_s, end)
+                if ratio > max_contrast:
+                    max_contrast = ratio
+                    best_rgb = c
+                if ratio < target_with_buffer:
+                    continue
+                passing = end
+            while abs(passing - failing) > 1:
+                mid = (failing + passing) // 2
+                mid_c, ratio = candidate(reduced_s, mid)
+                if ratio >= target_with_buffer:
+                    passing, c = mid, mid_c
+                else:
+                    failing = mid
+            return c
 
     # Pass 3: last resort – pure black/white
-    white = (255, 255, 255)
-    black = (0, 0, 0)
-    w_ratio = contrast_ratio(white, bg_rgb)
-    b_ratio = contrast_ratio(black, bg_rgb)
-
     if w_ratio >= target_with_buffer and w_ratio >= b_ratio: return white
     if b_ratio >= target_with_buffer: return black
 
@@ -204,25 +357,63 @@ def ensure_contrast_ratio(text_rgb: tuple[int, int, int], bg_rgb: tuple[int, int
     return result
 
 
-def extract_colors(image_path: str, blur: bool, count: int = 12) -> list:
-    path = Path(image_path)
-    if not path.exists():
-        raise FileNotFoundError(f"Image not found: {image_path}")
-    
-    work_path = str(path)
+@lru_cache(maxsize=4096)
+def button_background(rgb: tuple[int, int, int], body_bg: tuple[int, int, int]) -> tuple[int, int, int]:
+    """Button fill for a role colour: 3:1 against the body background, then pushed
+    out of the 0.10-0.30 luminance dead zone so white or black text can reach 7:1."""
+    # Must contrast with BodyBg
+    rgb = ensure_contrast_ratio(rgb, body_bg, 3.0)
+    l = get_luminance(rgb)
+    if 0.10 <= l <= 0.30:
+        rgb = shift_lightness(rgb, 15 if l > 0.20 else -15)
+    return rgb
+
+
+def quantize_palette(img: Image.Image, count: int, quality: int = 10) -> list:
+    """Run ColorThief's MMCQ on every `quality`-th opaque, non-white pixel.
+
+    Same sampling as ColorThief.get_palette(), but the stride and channel split
+    happen on the raw pixel buffer instead of a per-pixel Python loop.
+    """
+    if img.mode == 'RGB':
+        # Opaque image (e.g. JPEG): no alpha channel to add and test
+        data = img.tobytes()
+        stride = 3 * quality
+        pixels = [
+            (r, g, b)
+            for r, g, b in zip(data[0::stride], data[1::stride], data[2::stride])
+            if not (r > 250 and g > 250 and b > 250)
+        ]
+    else:
+        data = img.convert('RGBA').tobytes()
+        stride = 4 * quality
+        pixels = [
+            (r, g, b)
+            for r, g, b, a in zip(data[0::stride], data[1::stride], data[2::stride], data[3::stride])
+            if a >= 125 and not (r > 250 and g > 250 and b > 250)
+        ]
+    # MMCQ's box averages can round up to 256; clamp so every channel is a valid
+    # byte for the 256-entry lookup tables (_SRGB_TO_LINEAR, _HEX_BYTE)
+    return [
+        (max(0, min(255, r)), max(0, min(255, g)), max(0, min(255, b)))
+        for r, g, b in MMCQ.quantize(pixels, count).palette
+    ]
+
+
+def extract_colors(image: str | Image.Image, blur: bool, count: int = 12) -> list:
+    """Extract `count` dominant colours from an image path or an already loaded PIL image."""
+    if isinstance(image, Image.Image):
+        img = image
+    else:
+        path = Path(image)
+        if not path.exists():
+            raise FileNotFoundError(f"Image not found: {image}")
+        img = Image.open(path)
+
     if blur:
-        img = Image.open(image_path)
         img = img.filter(ImageFilter.GaussianBlur(radius=8))
-        work_path = f"/tmp/blurred_{path.name}"
-        img.save(work_path)
-    
-    color_thief = ColorThief(work_path)
-    palette = color_thief.get_palette(color_count=count, quality=10)
     
-    if blur and work_path != str(path):
-        Path(work_path).unlink(missing_ok=True)
-    
-    return palette
+    return quantize_palette(img, count, quality=10)
 
 
 def score_color(rgb, target_h=None):
@@ -282,24 +473,28 @@ def suggest_role_source_indices(colors: list[tuple[int, int, int]]) -> dict[str,
         return {}
 
     color_indices = list(range(len(colors)))
+    hsls = [rgb_to_hsl(c) for c in colors]
+    categories = [categorize_by_hue(c) for c in colors]
+    lums = [get_luminance(c) for c in colors]
+
     sorted_by_score = sorted(color_indices, key=lambda i: score_color(colors[i]), reverse=True)
     primary_idx = sorted_by_score[0]
-    primary_hue = rgb_to_hsl(colors[primary_idx])[0]
+    primary_hue = hsls[primary_idx][0]
 
     secondary_candidates = sorted(
         color_indices,
-        key=lambda i: hue_diff(rgb_to_hsl(colors[i])[0], primary_hue),
+        key=lambda i: hue_diff(hsls[i][0], primary_hue),
         reverse=True,
     )
     secondary_idx = next((i for i in secondary_candidates if i != primary_idx), primary_idx)
 
     def find_best_index(target_hue: float, category: str) -> int:
-        candidates = [i for i in color_indices if categorize_by_hue(colors[i]) == category]
+        candidates = [i for i in color_indices if categories[i] == category]
         if candidates:
-            return max(candidates, key=lambda i: rgb_to_hsl(colors[i])[1])
-        return min(color_indices, key=lambda i: hue_diff(rgb_to_hsl(colors[i])[0], target_hue))
+            return max(candidates, key=lambda i: hsls[i][1])
+        return min(color_indices, key=lambda i: hue_diff(hsls[i][0], target_hue))
 
-    sorted_by_lum = sorted(color_indices, key=lambda i: get_luminance(colors[i]))
+    sorted_by_lum = sorted(color_indices, key=lums.__getitem__)
 
     return {
         "Primary": primary_idx,
@@ -360,19 +555,23 @@ def write_palette_css(
 
 def get_role_map(colors: list) -> dict:
     """Map clusters to semantic roles with improved harmonization."""
-    sorted_by_score = sorted(colors, key=score_color, reverse=True)
-    primary = sorted_by_score[0] if sorted_by_score else (13, 110, 253)
+    # Only the extremes are used, so take max/min instead of sorting; ties keep
+    # the same winner a stable sort would put first (or last, for Light).
+    hsl = {c: rgb_to_hsl(c) for c in colors}
+    by_category = {}
+    for c in colors:
+        by_category.setdefault(categorize_by_hue(c), []).append(c)
+
+    primary = max(colors, key=score_color) if colors else (13, 110, 253)
     p_h, p_s, p_l = rgb_to_hsl(primary)
 
-    secondary_candidates = sorted(colors, key=lambda c: hue_diff(rgb_to_hsl(c)[0], p_h), reverse=True)
-    secondary = secondary_candidates[0] if len(secondary_candidates) > 1 else primary
+    secondary = max(colors, key=lambda c: hue_diff(hsl[c][0], p_h)) if len(colors) > 1 else primary
     
     def find_best_role(target_hue, category, fallback_h):
-        candidates = [c for c in colors if categorize_by_hue(c) == category]
+        candidates = by_category.get(category)
         if candidates:
             # Pick most saturated candidate
-            candidates.sort(key=lambda c: rgb_to_hsl(c)[1], reverse=True)
-            return refine_status_color(candidates[0], target_hue)
+            return refine_status_color(max(candidates, key=lambda c: hsl[c][1]), target_hue)
         
         # Fallback if category not in image: Use brand saturation, but role hue
         return hsl_to_rgb((fallback_h, min(p_s + 20, 85), 45))
@@ -389,9 +588,8 @@ def get_role_map(colors: list) -> dict:
     orange = find_best_role(30, "orange", 30)
     teal = find_best_role(160, "green", 160)
     
-    sorted_by_lum = sorted(colors, key=get_luminance)
-    light = sorted_by_lum[-1] if sorted_by_lum else (248, 249, 250)
-    dark = sorted_by_lum[0] if sorted_by_lum else (33, 37, 41)
+    light = max(reversed(colors), key=get_luminance) if colors else (248, 249, 250)
+    dark = min(colors, key=get_luminance) if colors else (33, 37, 41)
 
     light = normalize_light_role(light)
     dark = normalize_dark_role(dark)
@@ -423,8 +621,7 @@ def parse_ctbs_variables(overrides_path: str) -> list[str]:
     path = Path(overrides_path)
     if not path.exists():
         return []
-    content = path.read_text()
-    return sorted(list(set(re.findall(r'--CTBS-[a-zA-Z0-9-]*', content))))
+    return sorted({m.group() for m in _CTBS_VAR_RE.finditer(path.read_text())})
 
 
 def resolve_palette_value(
@@ -546,28 +743,19 @@ def generate_theme_css(
     else:
         full_dark_map = None
 
-    def get_ctbs_color(var_name: str) -> str:
-        name = var_name.replace("--CTBS-", "")
-        is_rgb = name.endswith("Rgb")
-        base_name = name[:-3] if is_rgb else name
-        is_dark_theme_var = "DarkTheme" in base_name
-        search_name = base_name.replace("DarkTheme", "")
-        
-        use_map = full_light_map
-        if is_dark_theme_var and full_dark_map:
-            use_map = full_dark_map
-
-        is_light_bg = get_luminance(body_bg) > 0.5
-        effective_light_bg = is_light_bg and not is_dark_theme_var
-        if full_dark_map and is_dark_theme_var:
-            effective_light_bg = False
-            
-        current_body_bg = use_map["BodyBg"]
-        current_body_color = use_map["BodyColor"]
-        
-        if is_dark_theme_var and not full_dark_map:
-            current_body_bg = full_light_map["Dark"]
-            current_body_color = full_light_map["Light"]
+    # (use_map, body bg, body color, light bg?) for light and DarkTheme variables;
+    # without a dark palette, DarkTheme variables fall back to Dark/Light roles.
+    is_light_bg = get_luminance(body_bg) > 0.5
+    light_context = (full_light_map, full_light_map["BodyBg"], full_light_map["BodyColor"], is_light_bg)
+    if full_dark_map:
+        dark_context = (full_dark_map, full_dark_map["BodyBg"], full_dark_map["BodyColor"], False)
+    else:
+        dark_context = (full_light_map, full_light_map["Dark"], full_light_map["Light"], False)
+
+    def resolve_ctbs_rgb(search_name: str, is_dark_theme_var: bool) -> tuple[int, int, int]:
+        use_map, current_body_bg, current_body_color, effective_light_bg = (
+            dark_context if is_dark_theme_var else light_context
+        )
         
         # Progress bar: fill uses Primary, text contrasts against fill
         if search_name.startswith("ProgressBar"):
@@ -577,8 +765,7 @@ def generate_theme_css(
                 rgb = ensure_contrast(bar_bg, 7.0)
             else:
                 rgb = bar_bg
-            if is_rgb: return f"{rgb[0]}, {rgb[1]}, {rgb[2]}"
-            return rgb_to_hex(rgb)
+            return rgb
 
         # Determine if we are in a component that might be placed on BodyBg or a component background
         is_alert = "Alert" in search_name
@@ -586,19 +773,9 @@ def generate_theme_css(
         is_bg = "Bg" in search_name or "Background" in search_name
         is_color = "Color" in search_name or "Text" in search_name
 
-        matched_base = None
-        for base in ["Primary", "Secondary", "Success", "Info", "Warning", "Danger", "Light", "Dark", "Gray", "Body", "Border", "Emphasis", "Link", "Form", "Btn", "Table", "Alert", "Badge", "Navbar", "Nav", "ListGroupItem", "Dropdown", "Card", "Modal", "Toast", "Offcanvas", "Blue", "Indigo", "Purple", "Pink", "Red", "Orange", "Yellow", "Green", "Teal", "Cyan"]:
-            if base in search_name:
-                matched_base = base
-                break
-        
-        is_alpha = "Alpha" in search_name
-        alpha_val = "1"
-        if is_alpha:
-            match = re.search(r'Alpha(\d+)', search_name)
-            if match:
-                alpha_val = f"0.{match.group(1)}"
-                if alpha_val == "0.0": alpha_val = "0"
+        # First base in CTBS_BASES order that occurs anywhere in the name
+        found_bases = _CTBS_BASE_RE.findall(search_name)
+        matched_base = min(found_bases, key=CTBS_BASES.index) if found_bases else None
         
         if not matched_base:
             if "White" in search_name: rgb = white
@@ -624,22 +801,19 @@ def generate_theme_css(
             elif matched_base == "Gray":
                 rgb = use_map.get("Gray", (108, 117, 125))
                 # Handle Gray100-900
-                match = re.search(r'Gray(\d+)', search_name)
+                match = _CTBS_GRAY_RE.search(search_name)
                 if match:
                     weight = int(match.group(1))
                     diff = (weight - 500) // 10
-                    if diff > 0:
-                        rgb = darken(rgb, diff)
-                    elif diff < 0:
-                        rgb = lighten(rgb, -diff)
+                    if diff:
+                        rgb = shift_lightness(rgb, -diff)
             else:
                 rgb = use_map.get(matched_base, (128, 128, 128))
             
             # Refine role if multiple bases present (e.g. SuccessTableBg)
-            for color_base in ["Primary", "Secondary", "Success", "Info", "Warning", "Danger", "Light", "Dark"]:
-                if color_base in search_name and color_base != matched_base:
-                    rgb = use_map[color_base]
-                    break
+            other_roles = [b for b in found_bases if b in CORE_ROLES and b != matched_base]
+            if other_roles:
+                rgb = use_map[min(other_roles, key=CORE_ROLES.index)]
         
         # Apply contrast and variation logic
         if "TextEmphasis" in search_name:
@@ -676,23 +850,17 @@ def generate_theme_css(
         elif "Hover" in search_name or "Active" in search_name:
             if is_bg:
                 # If it's a background, adjust relative to base bg
-                rgb = darken(rgb, 15) if effective_light_bg else lighten(rgb, 15)
+                rgb = shift_lightness(rgb, -15 if effective_light_bg else 15)
             else:
                 # If it's a text color, ensure it still contrasts
-                rgb = darken(rgb, 10) if effective_light_bg else lighten(rgb, 10)
+                rgb = shift_lightness(rgb, -10 if effective_light_bg else 10)
                 rgb = ensure_contrast_ratio(rgb, current_body_bg, 7.0)
         elif "Striped" in search_name:
-            rgb = darken(rgb, 5) if effective_light_bg else lighten(rgb, 5)
+            rgb = shift_lightness(rgb, -5 if effective_light_bg else 5)
         elif matched_base in ["Primary", "Secondary", "Success", "Info", "Warning", "Danger", "Link", "Emphasis", "Blue", "Indigo", "Purple", "Pink", "Red", "Orange", "Yellow", "Green", "Teal", "Cyan"]:
             # Foreground roles or Button backgrounds
             if is_bg and "Btn" in search_name:
-                # Button background: Must contrast with BodyBg
-                rgb = ensure_contrast_ratio(rgb, current_body_bg, 3.0)
-                # Dead-zone avoidance: ensure it supports 7.0 contrast with white OR black
-                l = get_luminance(rgb)
-                if 0.10 <= l <= 0.30:
-                    if l > 0.20: rgb = lighten(rgb, 15)
-                    else: rgb = darken(rgb, 15)
+                rgb = button_background(rgb, current_body_bg)
             elif is_color:
                 # Text: Must contrast with BodyBg (default)
                 rgb = ensure_contrast_ratio(rgb, current_body_bg, 7.0)
@@ -700,13 +868,7 @@ def generate_theme_css(
                 # Special case: Button Text MUST contrast with Button Background
                 if "Btn" in search_name:
                     # Determine button background color
-                    btn_bg = use_map.get(matched_base, rgb)
-                    btn_bg = ensure_contrast_ratio(btn_bg, current_body_bg, 3.0)
-                    l_bg = get_luminance(btn_bg)
-                    if 0.10 <= l_bg <= 0.30:
-                        if l_bg > 0.20: btn_bg = lighten(btn_bg, 15)
-                        else: btn_bg = darken(btn_bg, 15)
-                    
+                    btn_bg = button_background(use_map.get(matched_base, rgb), current_body_bg)
                     rgb = ensure_contrast_ratio(rgb, btn_bg, 7.0)
             else:
                 # Other foreground roles (links, etc.)
@@ -714,7 +876,31 @@ def generate_theme_css(
         elif is_color and matched_base not in ["Body", "Emphasis"]:
             rgb = ensure_contrast_ratio(rgb, current_body_bg, 7.0)
         
-        if is_alpha: return f"rgba({rgb[0]}, {rgb[1]}, {rgb[2]}, {alpha_val})"
+        return rgb
+
+    # Variables differing only in Rgb suffix share a colour; resolve each once.
+    resolved_rgb: dict[tuple[str, bool], tuple[int, int, int]] = {}
+
+    def get_ctbs_color(var_name: str) -> str:
+        name = var_name.replace("--CTBS-", "")
+        is_rgb = name.endswith("Rgb")
+        base_name = name[:-3] if is_rgb else name
+        is_dark_theme_var = "DarkTheme" in base_name
+        search_name = base_name.replace("DarkTheme", "")
+
+        key = (search_name, is_dark_theme_var)
+        rgb = resolved_rgb.get(key)
+        if rgb is None:
+            rgb = resolved_rgb[key] = resolve_ctbs_rgb(search_name, is_dark_theme_var)
+
+        # Progress bar colours are always opaque
+        if "Alpha" in search_name and not search_name.startswith("ProgressBar"):
+            alpha_val = "1"
+            match = _CTBS_ALPHA_RE.search(search_name)
+            if match:
+                alpha_val = f"0.{match.group(1)}"
+                if alpha_val == "0.0": alpha_val = "0"
+            return f"rgba({rgb[0]}, {rgb[1]}, {rgb[2]}, {alpha_val})"
         if is_rgb: return f"{rgb[0]}, {rgb[1]}, {rgb[2]}"
         return rgb_to_hex(rgb)
 
@@ -879,7 +1065,7 @@ def generate_theme_css(
             if var in generated_rgb:
                 lines.append(f"    {var}: {rgb_to_hex(generated_rgb[var])};")
             else:
-                lines.append(f"    {var}: {generated_raw.get(var, get_ctbs_color(var))};")
+                lines.append(f"    {var}: {generated_raw[var] if var in generated_raw else get_ctbs_color(var)};")
             processed_vars.add(var)
 
             rgb_var = var + "Rgb"
@@ -3,6 +3,7 @@
 import argparse
 import re
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
@@ -33,9 +34,8 @@ def _mode_label(mode: str) -> str:
     return "Day" if mode == "light" else "Night"
 
 
-def run(url: str, verbose: bool) -> list[str]:
-    audit_script = """
-    ({ normalTextMin, largeTextMin, verbose }) => {
+_AUDIT_SCRIPT = """
+    ({ normalTextMin, largeTextMin, verbose, maxFailures }) => {
       function parseColor(raw) {
         if (!raw || raw === 'transparent') return { r: 0, g: 0, b: 0, a: 0 };
         const m = raw.match(/rgba?\\(([^)]+)\\)/i);
@@ -72,30 +72,26 @@ def run(url: str, verbose: bool) -> list[str]:
       function contrastRatio(fg, bg) {
         const l1 = luminance(fg);
         const l2 = luminance(bg);
-        const light = Math.max(l1, l2);
-        const dark = Math.min(l1, l2);
-        return (light + 0.05) / (dark + 0.05);
+        return l1 > l2 ? (l1 + 0.05) / (l2 + 0.05) : (l2 + 0.05) / (l1 + 0.05);
       }
 
-      function isVisible(el) {
-        const style = getComputedStyle(el);
+      function isVisible(el, style) {
         if (style.visibility === 'hidden' || style.display === 'none') return false;
         const rect = el.getBoundingClientRect();
         return rect.width > 0 && rect.height > 0;
       }
 
+      // Effective background of each element, blended over its ancestors once and
+      // shared by every text node below it.
+      const backgroundCache = new Map();
+
       function resolveBackground(el) {
-        let result = { r: 255, g: 255, b: 255, a: 1 };
-        let node = el;
-        const layers = [];
-        while (node) {
-          const c = parseColor(getComputedStyle(node).backgroundColor);
-          if (c.a > 0) layers.push(c);
-          node = node.parentElement;
-        }
-        for (let i = layers.length - 1; i >= 0; i -= 1) {
-          result = blend(layers[i], result);
-        }
+        if (!el) return { r: 255, g: 255, b: 255, a: 1 };
+        if (backgroundCache.has(el)) return backgroundCache.get(el);
+        const below = resolveBackground(el.parentElement);
+        const c = parseColor(getComputedStyle(el).backgroundColor);
+        const result = c.a > 0 ? blend(c, below) : below;
+        backgroundCache.set(el, result);
         return result;
       }
 
@@ -126,15 +122,17 @@ def run(url: str, verbose: bool) -> list[str]:
 
       while (walker.nextNode()) {
         const node = walker.currentNode;
-        if (!node.textContent || !node.textContent.trim()) continue;
+        const text = node.textContent ? node.textContent.trim() : '';
+        if (!text) continue;
         const el = node.parentElement;
-        if (!el || !isVisible(el)) continue;
+        if (!el) continue;
+        const style = getComputedStyle(el);
+        if (!isVisible(el, style)) continue;
 
-        const key = `${el.tagName}|${el.className}|${node.textContent.trim()}`;
+        const key = `${el.tagName}|${el.className}|${text}`;
         if (seen.has(key)) continue;
         seen.add(key);
 
-        const style = getComputedStyle(el);
         const fg = parseColor(style.color);
         const bg = resolveBackground(el);
         const ratio = contrastRatio(fg, bg);
@@ -143,104 +141,152 @@ def run(url: str, verbose: bool) -> list[str]:
         const isLarge = fontSize >= 24 || (fontSize >= 18.66 && fontWeight >= 700);
         const threshold = isLarge ? largeTextMin : normalTextMin;
 
-        if (verbose) {
-          checked.push({
-            text: node.textContent.trim().replace(/\\s+/g, ' ').slice(0, 80),
-            tags: classify(el),
-            ratio: Number(ratio.toFixed(2))
-          });
-        }
+        const failed = ratio < threshold;
+        if (!verbose && !failed) continue;
 
-        if (ratio < threshold) {
-          failures.push({
-            text: node.textContent.trim().replace(/\\s+/g, ' ').slice(0, 80),
-            ratio: Number(ratio.toFixed(2)),
-            required: threshold,
-            tags: classify(el)
-          });
-        }
+        const record = {
+          text: text.replace(/\\s+/g, ' ').slice(0, 80),
+          tags: classify(el),
+          ratio: Number(ratio.toFixed(2))
+        };
+        if (verbose) checked.push(record);
+        if (failed) failures.push({ ...record, required: threshold });
       }
 
+      // Only the worst few failures are reported, so only those cross the bridge.
       failures.sort((a, b) => a.ratio - b.ratio);
-      return { failures, checked };
+      return { failures: failures.slice(0, maxFailures), checked };
     }
     """
 
-    scenarios = []
-    with sync_playwright() as pw:
-        browser = pw.chromium.launch(channel="chromium", headless=True)
-        page = browser.new_page(viewport={"width": 1440, "height": 2200})
-        page.goto(url, wait_until="networkidle")
-        page.evaluate(
-            """
-            () => {
-              const opacityRange = document.getElementById('opacityRange');
-              if (opacityRange) {
-                opacityRange.value = opacityRange.max || '1';
-                opacityRange.dispatchEvent(new Event('input', { bubbles: true }));
-              }
-
-              const motion = document.createElement('style');
-              motion.innerHTML = '* { transition: none !important; animation: none !important; }';
-              document.head.appendChild(motion);
-              const bg = document.createElement('style');
-              bg.innerHTML = 'body::before { background-image: none !important; }';
-              document.head.appendChild(bg);
-              if (typeof updateTheme === 'function') updateTheme();
-            }
-            """
-        )
-
-        options = page.eval_on_selector_all(
-            "#themeSelect option",
-            "opts => opts.map(o => ({ value: o.value, label: o.textContent.trim() }))",
-        )
-
-        for option in options:
-            page.select_option("#themeSelect", option["value"])
-            page.wait_for_function(
-                "theme => document.getElementById('themeStylesheet').getAttribute('href').includes(`/` + theme + `/theme.css`)",
-                arg=option["value"],
+# Switch theme (waiting for its stylesheet to load) and mode in one round trip,
+# then let two animation frames pass so the new styles are committed.
+_SCENARIO_SCRIPT = """
+    async ({ theme, mode }) => {
+      const select = document.getElementById('themeSelect');
+      const link = document.getElementById('themeStylesheet');
+      if (select.value !== theme) {
+        const loaded = new Promise(resolve => {
+          link.addEventListener('load', resolve, { once: true });
+          link.addEventListener('error', resolve, { once: true });
+        });
+        select.value = theme;
+        select.dispatchEvent(new Event('change', { bubbles: true }));
+        await loaded;
+      }
+      document.documentElement.setAttribute('data-bs-theme', mode);
+      if (typeof updateTheme === 'function') updateTheme();
+      await new Promise(resolve => requestAnimationFrame(() => requestAnimationFrame(resolve)));
+    }
+    """
+
+
+def _open_audit_page(pw, url: str):
+    """Launch a browser on `url` with the page prepared and the audit compiled."""
+    browser = pw.chromium.launch(channel="chromium", headless=True)
+    page = browser.new_page(viewport={"width": 1440, "height": 2200})
+    page.goto(url, wait_until="networkidle")
+    page.evaluate(
+        """
+        () => {
+          const opacityRange = document.getElementById('opacityRange');
+          if (opacityRange) {
+            opacityRange.value = opacityRange.max || '1';
+            opacityRange.dispatchEvent(new Event('input', { bubbles: true }));
+          }
+
+          const motion = document.createElement('style');
+          motion.innerHTML = '* { transition: none !important; animation: none !important; }';
+          document.head.appendChild(motion);
+          const bg = document.createElement('style');
+          bg.innerHTML = 'body::before { background-image: none !important; }';
+          document.head.appendChild(bg);
+          if (typeof updateTheme === 'function') updateTheme();
+        }
+        """
+    )
+
+    # Compile the audit once per page; each scenario then only sends its arguments.
+    page.evaluate(f"() => {{ window.__wcagAudit = {_AUDIT_SCRIPT}; }}")
+    return browser, page
+
+
+def _theme_options(page) -> list[dict]:
+    return page.eval_on_selector_all(
+        "#themeSelect option",
+        "opts => opts.map(o => ({ value: o.value, label: o.textContent.trim() }))",
+    )
+
+
+def _audit_themes(page, options: list[dict], verbose: bool, worker: int, workers: int) -> list[tuple[int, list[str], str | None]]:
+    """Audit every `workers`-th theme, starting at `worker`, on `page`.
+
+    Returns (scenario index, verbose lines, failure summary or None) per theme and mode.
+    """
+    results = []
+    for option_index in range(worker, len(options), workers):
+        option = options[option_index]
+        for mode_index, mode in enumerate(("light", "dark")):
+            page.evaluate(_SCENARIO_SCRIPT, {"theme": option["value"], "mode": mode})
+
+            result = page.evaluate(
+                "args => window.__wcagAudit(args)",
+                {"normalTextMin": 7.0, "largeTextMin": 4.5, "verbose": verbose, "maxFailures": 5},
             )
 
-            for mode in ("light", "dark"):
-                page.evaluate(
-                    """
-                    (mode) => {
-                      document.documentElement.setAttribute('data-bs-theme', mode);
-                      if (typeof updateTheme === 'function') updateTheme();
-                    }
-                    """,
-                    mode,
-                )
-                page.wait_for_function(
-                    "mode => document.documentElement.getAttribute('data-bs-theme') === mode",
-                    arg=mode,
-                )
-                page.wait_for_timeout(180)
+            theme_name = _theme_label(option["label"])
+            mode_name = _mode_label(mode)
 
-                result = page.evaluate(
-                    audit_script,
-                    {"normalTextMin": 7.0, "largeTextMin": 4.5, "verbose": verbose},
+            lines = []
+            if verbose:
+                for checked in result["checked"]:
+                    tags = ", ".join(checked["tags"])
+                    lines.append(f'{theme_name}, {mode_name}, "{checked["text"]}", {tags}')
+
+            failure = None
+            if result["failures"]:
+                sample = "; ".join(
+                    f"{f['ratio']}<{f['required']} ('{f['text']}') [{', '.join(f['tags'])}]"
+                    for f in result["failures"]
                 )
+                failure = f"{theme_name}/{mode_name}: {sample}"
 
-                theme_name = _theme_label(option["label"])
-                mode_name = _mode_label(mode)
+            results.append((option_index * 2 + mode_index, lines, failure))
 
-                if verbose:
-                    for checked in result["checked"]:
-                        tags = ", ".join(checked["tags"])
-                        print(f'{theme_name}, {mode_name}, "{checked["text"]}", {tags}')
+    return results
 
-                if result["failures"]:
-                    sample = "; ".join(
-                        f"{f['ratio']}<{f['required']} ('{f['text']}') [{', '.join(f['tags'])}]"
-                        for f in result["failures"][:5]
-                    )
-                    scenarios.append(f"{theme_name}/{mode_name}: {sample}")
 
+def _audit_worker(url: str, verbose: bool, worker: int, workers: int) -> list[tuple[int, list[str], str | None]]:
+    """Audit this worker's slice of the themes in a browser of its own."""
+    with sync_playwright() as pw:
+        browser, page = _open_audit_page(pw, url)
+        results = _audit_themes(page, _theme_options(page), verbose, worker, workers)
         browser.close()
+    return results
 
+
+def run(url: str, verbose: bool, workers: int = 4) -> list[str]:
+    # Scenarios are independent, so themes are spread over several browsers
+    # (the sync Playwright API is per-thread) and reported in theme order.
+    # The first browser reads the theme list and caps the worker count, so no
+    # browser is launched for an empty slice; it then audits slice 0 itself.
+    with sync_playwright() as pw:
+        browser, page = _open_audit_page(pw, url)
+        options = _theme_options(page)
+        workers = max(1, min(workers, len(options)))
+        with ThreadPoolExecutor(max_workers=max(1, workers - 1)) as pool:
+            futures = [pool.submit(_audit_worker, url, verbose, worker, workers) for worker in range(1, workers)]
+            results = _audit_themes(page, options, verbose, 0, workers)
+            browser.close()
+            results += [r for future in futures for r in future.result()]
+    results.sort(key=lambda r: r[0])
+
+    scenarios = []
+    for _, lines, failure in results:
+        for line in lines:
+            print(line)
+        if failure:
+            scenarios.append(failure)
     return scenarios
 
 
@@ -248,6 +294,7 @@ def main():
     parser = argparse.ArgumentParser(description="Run browser WCAG text-contrast audit")
     parser.add_argument("-v", "--verbose", action="store_true", help="Log every checked text element")
     parser.add_argument("--url", help="Use an existing preview URL instead of local index.html")
+    parser.add_argument("--workers", type=int, default=4, help="Number of parallel browsers (default: 4)")
     args = parser.parse_args()
 
     server = None
@@ -260,7 +307,7 @@ def main():
             server, thread = _start_static_server(repo_root)
             url = f"http://127.0.0.1:{server.server_address[1]}/index.html"
 
-        failures = run(url, args.verbose)
+        failures = run(url, args.verbose, max(1, args.workers))
         if failures:
             print("\nRendered WCAG contrast failures detected:")
             for f in failures:
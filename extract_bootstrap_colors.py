@@ -3,16 +3,143 @@ import re
 import sys
 import os
 import argparse
+from collections import defaultdict
+from functools import lru_cache
+
+# Regex for hex, rgb, rgba, hsl, hsla colors
+_COLOR_RE = re.compile(r'#(?:[0-9a-fA-F]{3,4}){1,2}\b|rgba?\([^)]+\)|hsla?\([^)]+\)')
+# Special regex for naked RGB values used in --bs-*-rgb variables (e.g. 13, 110, 253)
+_NAKED_RGB_RE = re.compile(r'^\s*\d+\s*,\s*\d+\s*,\s*\d+\s*$')
+_RGB_SPLIT_RE = re.compile(r'[(,)]')
+_RGB_EXTRACT_RE = re.compile(r'rgba?\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)')
+_COMMENT_RE = re.compile(rb'/\*.*?\*/', re.DOTALL)
+
+
+@lru_cache(maxsize=4096)
+def normalize_color(color):
+    """Normalize color strings for consistent mapping."""
+    color = color.strip().lower()
+    if color.startswith('#'):
+        # Expand short hex #abc to #aabbcc
+        c = color
+        if len(c) == 4:
+            return f"#{c[1]}{c[1]}{c[2]}{c[2]}{c[3]}{c[3]}"
+        if len(c) == 5:
+            return f"#{c[1]}{c[1]}{c[2]}{c[2]}{c[3]}{c[3]}{c[4]}{c[4]}"
+        return color
+    if 'rgba' in color or 'rgb' in color:
+        # Normalize whitespace and alpha leading zero
+        parts = _RGB_SPLIT_RE.split(color)
+        if len(parts) >= 5: # rgba
+            r, g, b, a = parts[1], parts[2], parts[3], parts[4]
+            a = a.strip()
+            if a.startswith('.'): a = '0' + a
+            try:
+                a_val = float(a)
+                # Use string formatting to avoid .0 for integers but keep decimals
+                a_str = format(a_val, 'g')
+                return f"rgba({r.strip()}, {g.strip()}, {b.strip()}, {a_str})"
+            except ValueError:
+                pass
+        elif len(parts) >= 4: # rgb
+            r, g, b = parts[1], parts[2], parts[3]
+            return f"rgb({r.strip()}, {g.strip()}, {b.strip()})"
+    return color
+
+
+@lru_cache(maxsize=4096)
+def rgb_triplet(color):
+    """Return the naked "r, g, b" form of a normalized color, or None if it has none.
+
+    Many contextual variables share one color, so each color is parsed once.
+    """
+    if 'rgb' in color:
+        # Extract r, g, b from rgb(...) or rgba(...)
+        match = _RGB_EXTRACT_RE.search(color)
+        if match:
+            return f"{match.group(1)}, {match.group(2)}, {match.group(3)}"
+        return None
+    if color.startswith('#'):
+        # Hex to naked RGB
+        r, g, b = bytes.fromhex(color[1:7])
+        return f"{r}, {g}, {b}"
+    if _NAKED_RGB_RE.match(color):
+        return color
+    return None
+
+
+@lru_cache(maxsize=2048)
+def pascal_case(name):
+    """Convert kebab-case to PascalCase, e.g. primary-bg-subtle -> PrimaryBgSubtle."""
+    return "".join(p.capitalize() for p in name.split('-'))
+
+
+# Static tail of the overrides file; accessibility_tail_overrides() fills in
+# the per-role rule lists
+_TAIL_TEMPLATE = """
+
+/* 3. ACCESSIBILITY SAFETY OVERRIDES (AAA-oriented) */
+:root,
+[data-bs-theme=light],
+[data-bs-theme=dark] {{
+  --bs-secondary-color: var(--CTBS-SecondaryColor);
+}}
+
+.text-body-secondary,
+.nav-link.disabled,
+.page-link.disabled,
+.page-item.disabled .page-link {{
+  color: var(--bs-body-color) !important;
+  opacity: 1;
+}}
+
+.pagination .page-link {{
+  color: var(--bs-body-color);
+  background-color: var(--bs-body-bg);
+  border-color: var(--bs-border-color);
+}}
+
+.pagination .page-item.active .page-link {{
+  color: var(--bs-body-bg);
+  background-color: var(--bs-body-color);
+  border-color: var(--bs-body-color);
+}}
+
+.pagination .page-item.disabled .page-link {{
+  color: var(--bs-body-color) !important;
+  background-color: var(--bs-body-bg);
+  opacity: 1;
+}}
+
+/* 4. TEXT-BG UTILITY CONTRAST OVERRIDES */
+/* Override Bootstrap !important color in .text-bg-* with themed btn-color */
+{text_bg_light}
+
+{text_bg_dark}
+
+/* Disable glass overlays inside colored utility cards so text-bg contrast is reliable */
+[class*="text-bg-"] .card-header,
+[class*="text-bg-"] .card-footer {{
+  background-color: transparent;
+  backdrop-filter: none;
+}}
+
+/* 5. DARK-MODE OUTLINE BUTTON OVERRIDES */
+{outline_dark}
+"""
+
 
 class BootstrapExtractor:
     def __init__(self):
-        # Regex for hex, rgb, rgba, hsl, hsla colors, AND comma-separated RGB values (e.g. 13, 110, 253)
-        self.color_regex = r'#(?:[0-9a-fA-F]{3,4}){1,2}\b|rgba?\([^)]+\)|hsla?\([^)]+\)'
-        # Special regex for naked RGB values used in --bs-*-rgb variables
-        self.naked_rgb_regex = r'^\s*\d+\s*,\s*\d+\s*,\s*\d+\s*$'
         self.color_map = {} # maps color value to semantic variable name
-        self.var_definitions = []
-        self.value_to_bs_name = {} # maps literal color to a list of potential names
+        self.var_definitions = {} # variable name -> definition line; first definition wins
+        self.value_to_bs_name = defaultdict(list) # maps literal color to a list of potential names
+        self._ctx_cache = {} # (selector, prop) -> contextual name
+        self._used_names = set() # every variable name handed out so far
+        self._name_to_value = {} # contextual variable name -> its color
+        self._process_cache = {} # (value, selector, prop) -> rewritten value
+        self._var_name_cache = {} # (raw color, selector, prop) -> variable name
+        self._parsed = None # (css_text, rule tree) of the last parsed stylesheet
         
         # Priority for semantic names
         self.name_priority = [
@@ -20,6 +147,7 @@ class BootstrapExtractor:
             'light', 'dark', 'body-color', 'body-bg', 'emphasis-color', 
             'link-color', 'border-color'
         ]
+        self._name_rank = {name: rank for rank, name in enumerate(self.name_priority)}
 
         # Glassmorphism eligible selectors
         self.glass_selectors = [
@@ -27,6 +155,16 @@ class BootstrapExtractor:
             '.list-group-item', '.toast', '.offcanvas', '.content-wrapper', '.card-header', '.card-footer'
         ]
         self.glass_properties = ['background-color', 'background', '--bs-card-bg', '--bs-alert-bg', '--bs-navbar-bg', '--bs-dropdown-bg', '--bs-modal-bg']
+        self._glass_properties = frozenset(self.glass_properties)
+        self._glass_selector_re = re.compile('|'.join(map(re.escape, self.glass_selectors)))
+        self._glass_sel_cache = {} # selector -> whether it matches a glass selector
+
+    def is_glass_selector(self, selector):
+        """Whether the selector targets a glassmorphism-eligible component."""
+        is_glass = self._glass_sel_cache.get(selector)
+        if is_glass is None:
+            is_glass = self._glass_sel_cache[selector] = bool(self._glass_selector_re.search(selector))
+        return is_glass
 
     def get_semantic_name(self, bs_names):
         """Pick the best semantic name from a list of Bootstrap variable names."""
@@ -34,9 +172,9 @@ class BootstrapExtractor:
         clean_names = [name.replace('--bs-', '') for name in bs_names]
         
         # Check priority list
-        for priority_name in self.name_priority:
-            if priority_name in clean_names:
-                return priority_name
+        ranked = [name for name in clean_names if name in self._name_rank]
+        if ranked:
+            return min(ranked, key=self._name_rank.__getitem__)
         
         # Otherwise, pick the shortest name that isn't just a color name if possible
         # For now, just pick the first one and format it
@@ -48,88 +186,82 @@ class BootstrapExtractor:
 
     def format_ctbs_name(self, semantic_name):
         """Format a semantic name into the --CTBS-Name format."""
-        parts = semantic_name.split('-')
-        capitalized_parts = [p.capitalize() for p in parts]
-        return f"--CTBS-{''.join(capitalized_parts)}"
-
-    # Selector pattern -> (regex, suffix) for contextual name extraction
-    _SELECTOR_PATTERNS = [
-        (".btn-",             r'\.btn-([a-z0-9-]+)',             "Btn"),
-        (".table-",           r'\.table-([a-z0-9-]+)',           "Table"),
-        (".alert-",           r'\.alert-([a-z0-9-]+)',           "Alert"),
-        (".badge-",           r'\.badge-([a-z0-9-]+)',           "Badge"),
-        (".list-group-item-", r'\.list-group-item-([a-z0-9-]+)', "ListGroupItem"),
-        (".navbar-",          r'\.navbar-([a-z0-9-]+)',          "Navbar"),
-        (".nav-",             r'\.nav-([a-z0-9-]+)',             "Nav"),
-    ]
-    # Literal selector -> fixed name (no regex needed)
+        return f"--CTBS-{pascal_case(semantic_name)}"
+
+    # Selector keyword -> suffix for contextual name extraction, in priority order
+    _SELECTOR_SUFFIXES = {
+        "btn":             "Btn",
+        "table":           "Table",
+        "alert":           "Alert",
+        "badge":           "Badge",
+        "list-group-item": "ListGroupItem",
+        "navbar":          "Navbar",
+        "nav":             "Nav",
+    }
+    _SELECTOR_RE = re.compile(r'\.(' + '|'.join(map(re.escape, _SELECTOR_SUFFIXES)) + r')-([a-z0-9-]+)')
+    # Literal selector -> fixed name, in priority order
     _SELECTOR_LITERALS = {
         "data-bs-theme=dark": "DarkTheme",
         ".form-control":      "FormControl",
         ".form-check-input":  "FormCheckInput",
         ".dropdown-item":     "DropdownItem",
     }
+    _SELECTOR_LITERAL_RE = re.compile('|'.join(map(re.escape, _SELECTOR_LITERALS)))
     # Prefixes stripped from property names before PascalCase conversion
     _PROP_STRIP = ["--bs-", "btn-", "table-", "alert-", "badge-", "list-group-item-", "navbar-", "nav-"]
+    _PROP_STRIP_RE = re.compile("|".join(map(re.escape, _PROP_STRIP)))
 
     def get_contextual_name(self, selector, prop):
         """Generate a semantic name from CSS context."""
         if not selector or not prop:
             return None
+        key = (selector, prop)
+        if key in self._ctx_cache:
+            return self._ctx_cache[key]
 
         sel_name = ""
-        for prefix, regex, suffix in self._SELECTOR_PATTERNS:
-            if prefix in selector:
-                m = re.search(regex, selector)
-                if m:
-                    sel_name = "".join(p.capitalize() for p in m.group(1).split('-')) + suffix
+        matches = {}
+        for m in self._SELECTOR_RE.finditer(selector):
+            matches.setdefault(m.group(1), m.group(2))
+        for keyword, suffix in self._SELECTOR_SUFFIXES.items():
+            if keyword in matches:
+                sel_name = pascal_case(matches[keyword]) + suffix
                 break
         if not sel_name:
+            found = set(self._SELECTOR_LITERAL_RE.findall(selector))
             for literal, name in self._SELECTOR_LITERALS.items():
-                if literal in selector:
+                if literal in found:
                     sel_name = name
                     break
 
-        prop_name = prop
-        for strip in self._PROP_STRIP:
-            prop_name = prop_name.replace(strip, "")
-        prop_name = "".join(p.capitalize() for p in prop_name.split('-'))
-
-        if sel_name:
-            return f"{sel_name}{prop_name}"
-        return prop_name
-
-    def normalize_color(self, color):
-        """Normalize color strings for consistent mapping."""
-        color = color.strip().lower()
-        if color.startswith('#'):
-            # Expand short hex #abc to #aabbcc
-            if len(color) == 4:
-                return '#' + color[1]*2 + color[2]*2 + color[3]*2
-            if len(color) == 5:
-                return '#' + color[1]*2 + color[2]*2 + color[3]*2 + color[4]*2
-            return color
-        if 'rgba' in color or 'rgb' in color:
-            # Normalize whitespace and alpha leading zero
-            parts = re.split(r'[(,)]', color)
-            if len(parts) >= 5: # rgba
-                r, g, b, a = parts[1], parts[2], parts[3], parts[4]
-                a = a.strip()
-                if a.startswith('.'): a = '0' + a
-                try:
-                    a_val = float(a)
-                    # Use string formatting to avoid .0 for integers but keep decimals
-                    a_str = format(a_val, 'g')
-                    return f"rgba({r.strip()}, {g.strip()}, {b.strip()}, {a_str})"
-                except ValueError:
-                    pass
-            elif len(parts) >= 4: # rgb
-                r, g, b = parts[1], parts[2], parts[3]
-                return f"rgb({r.strip()}, {g.strip()}, {b.strip()})"
-        return color
+        prop_name = pascal_case(self._PROP_STRIP_RE.sub("", prop))
+
+        name = f"{sel_name}{prop_name}" if sel_name else prop_name
+        self._ctx_cache[key] = name
+        return name
+
+    # Patterns shared by every extractor instance
+    _WHITE_ALPHA_RE = re.compile(r'rgba\(255,255,255,([0-9.]+)\)')
+    _BLACK_ALPHA_RE = re.compile(r'rgba\(0,0,0,([0-9.]+)\)')
+    _THEME_SELECTOR_RE = re.compile(r':root|\[data-bs-theme=[a-z]+\]')
+    _LIGHT_ROOT_SELECTOR_RE = re.compile(r':root|\[data-bs-theme=light\]')
+    _PROPS_SPLIT_RE = re.compile(r';(?![^\(]*\))')
+    _CTBS_VAR_RE = re.compile(r'var\((--CTBS-[a-zA-Z0-9-]+)\)')
+    _BS_VAR_RE = re.compile(r'var\(--bs-([a-z-]+)\)')
+    _CTBS_RGB_RE = re.compile(r'--CTBS-([A-Za-z0-9]+)Rgb')
+    _BRACE_RE = re.compile(r'[{}]')
 
     def get_var_name(self, color_val, selector=None, prop=None):
-        color_val = self.normalize_color(color_val)
+        # A name, once assigned, is stable for its (color, selector, prop), so later
+        # requests skip normalization and the context lookup entirely
+        key = (color_val, selector, prop)
+        var_name = self._var_name_cache.get(key)
+        if var_name is None:
+            var_name = self._var_name_cache[key] = self._assign_var_name(color_val, selector, prop)
+        return var_name
+
+    def _assign_var_name(self, color_val, selector, prop):
+        color_val = normalize_color(color_val)
         
         # Contextual name has high priority for components to ensure unique themed variables
         ctx_name = self.get_contextual_name(selector, prop)
@@ -145,10 +277,9 @@ class BootstrapExtractor:
             # Ensure uniqueness of the variable name itself
             original_var_name = var_name
             counter = 1
-            while any(v == var_name for v in self.color_map.values()):
+            while var_name in self._used_names:
                 # If the same name exists, check if it has the same value
-                found_val = next((k[0] for k, v in self.color_map.items() if v == var_name), None)
-                if found_val == color_val:
+                if self._name_to_value.get(var_name) == color_val:
                     # Same name, same value -> reuse
                     self.color_map[key] = var_name
                     return var_name
@@ -156,6 +287,8 @@ class BootstrapExtractor:
                 counter += 1
             
             self.color_map[key] = var_name
+            self._used_names.add(var_name)
+            self._name_to_value[var_name] = color_val
             self._define_var(var_name, color_val)
             return var_name
 
@@ -163,15 +296,16 @@ class BootstrapExtractor:
             var_name = None
             
             # Special handling for common white/black translucents
-            if 'rgba(255,255,255,' in color_val.replace(' ', ''):
-                match = re.search(r'rgba\(255,255,255,([0-9.]+)\)', color_val.replace(' ', ''))
+            compact = color_val.replace(' ', '')
+            if 'rgba(255,255,255,' in compact:
+                match = self._WHITE_ALPHA_RE.search(compact)
                 if match:
                     alpha = match.group(1)
                     nice_alpha = alpha.replace('0.', '').replace('.', '')
                     if nice_alpha == '0': nice_alpha = '0'
                     var_name = f"--CTBS-WhiteAlpha{nice_alpha}"
-            elif 'rgba(0,0,0,' in color_val.replace(' ', ''):
-                match = re.search(r'rgba\(0,0,0,([0-9.]+)\)', color_val.replace(' ', ''))
+            elif 'rgba(0,0,0,' in compact:
+                match = self._BLACK_ALPHA_RE.search(compact)
                 if match:
                     alpha = match.group(1)
                     nice_alpha = alpha.replace('0.', '').replace('.', '')
@@ -190,107 +324,168 @@ class BootstrapExtractor:
             # Ensure uniqueness
             original_var_name = var_name
             counter = 1
-            while var_name in self.color_map.values():
+            while var_name in self._used_names:
                 var_name = f"{original_var_name}-{counter}"
                 counter += 1
                 
             self.color_map[color_val] = var_name
+            self._used_names.add(var_name)
             self._define_var(var_name, color_val)
             
         return self.color_map[color_val]
 
+    def _add_definition(self, var_name, value):
+        # A name can be registered twice, e.g. --CTBS-BodyBgRgb as both the companion of
+        # --CTBS-BodyBg and the target of --bs-body-bg-rgb; emit it once
+        self.var_definitions.setdefault(var_name, f"  {var_name}: {value};")
+
     def _define_var(self, var_name, color_val):
-        self.var_definitions.append(f"  {var_name}: {color_val};")
+        self._add_definition(var_name, color_val)
         
         # Also define the RGB variant for translucency support if it's not already an RGB/naked value
         if not var_name.endswith("Rgb"):
-            rgb_var = f"{var_name}Rgb"
-            if 'rgb' in color_val:
-                # Extract r, g, b from rgb(...) or rgba(...)
-                match = re.search(r'rgba?\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)', color_val)
-                if match:
-                    rgb_val = f"{match.group(1)}, {match.group(2)}, {match.group(3)}"
-                    self.var_definitions.append(f"  {rgb_var}: {rgb_val};")
-            elif color_val.startswith('#'):
-                # Hex to naked RGB
-                h = color_val.lstrip('#')
-                r, g, b = tuple(int(h[i:i+2], 16) for i in (0, 2, 4))
-                self.var_definitions.append(f"  {rgb_var}: {r}, {g}, {b};")
-            elif re.match(self.naked_rgb_regex, color_val):
-                self.var_definitions.append(f"  {rgb_var}: {color_val};")
+            rgb_val = rgb_triplet(color_val)
+            if rgb_val is not None:
+                self._add_definition(f"{var_name}Rgb", rgb_val)
 
     def process_value(self, val, selector=None, prop=None):
         if 'var(' in val:
             return val
+        # Values like "0", "1rem" or "solid" cannot hold a color literal or a naked RGB triplet
+        if '#' not in val and 'rgb' not in val and 'hsl' not in val and ',' not in val:
+            return val
+
+        # get_var_name is stable for a given (color, selector, prop), so repeated declarations can reuse the result
+        key = (val, selector, prop)
+        if key in self._process_cache:
+            return self._process_cache[key]
             
-        is_naked_rgb = re.match(self.naked_rgb_regex, val)
+        is_naked_rgb = _NAKED_RGB_RE.match(val)
         if is_naked_rgb:
             var_name = self.get_var_name(val, selector, prop)
-            return f"var({var_name})"
+            new_val = f"var({var_name})"
+        else:
+            # One pass over the value; colors are registered in the order they appear
+            new_val = _COLOR_RE.sub(
+                lambda m: f"var({self.get_var_name(m.group(0), selector, prop)})", val)
+        self._process_cache[key] = new_val
+        return new_val
+
+    def _parse_css(self, text):
+        """Split CSS text into a tree of (selector, declarations, children) rules.
+
+        Style rules carry (prop, val) pairs and None for children. At-rules carry
+        their nested rules in children; one without nested rules also keeps its
+        declarations, since a prelude like '@charset "UTF-8"; :root' still opens
+        the :root block.
+        """
+        # Only brace positions matter for nesting, so find those once and walk them
+        # instead of every character; nested blocks are parsed as offset ranges
+        braces = [(m.start(), m.group()) for m in self._BRACE_RE.finditer(text)]
+        return self._parse_range(text, braces, 0, 0, len(text))
+
+    def _parse_range(self, text, braces, b, lo, hi):
+        """Parse text[lo:hi], starting at braces[b], the first brace at or after lo."""
+        rules = []
+        i = lo
+        while i < hi:
+            # Stray closing braces stay in the selector text and are split off below
+            while b < len(braces) and braces[b][0] < hi and braces[b][1] == '}':
+                b += 1
+            if b == len(braces) or braces[b][0] >= hi:
+                break
+            start_brace = braces[b][0]
             
-        colors_found = re.findall(self.color_regex, val)
-        if colors_found:
-            new_val = val
-            for color in set(colors_found):
-                var_name = self.get_var_name(color, selector, prop)
-                if color.startswith('#'):
-                    new_val = re.sub(re.escape(color) + r'\b', f"var({var_name})", new_val)
-                else:
-                    new_val = new_val.replace(color, f"var({var_name})")
-            return new_val
-        return val
+            selector = text[i:start_brace].strip()
+            if '}' in selector:
+                selector = selector.split('}')[-1].strip()
+            # Selectors and property names recur thousands of times as cache keys
+            selector = sys.intern(selector)
+            
+            depth = 1
+            j = hi
+            b += 1
+            inner_b = b
+            while b < len(braces) and braces[b][0] < hi:
+                pos, brace = braces[b]
+                b += 1
+                depth += 1 if brace == '{' else -1
+                if depth == 0:
+                    j = pos + 1
+                    break
+            
+            if selector.startswith('@'):
+                children = self._parse_range(text, braces, inner_b, start_brace + 1, j - 1)
+                declarations = None if children else self._split_declarations(text[start_brace+1:j-1])
+                rules.append((selector, declarations, children))
+            else:
+                rules.append((selector, self._split_declarations(text[start_brace+1:j-1]), None))
+            i = j
+        return rules
+
+    def _split_declarations(self, block_content):
+        declarations = []
+        for prop_line in self._PROPS_SPLIT_RE.split(block_content):
+            # partition finds the first ':' once; the outer whitespace goes with the two strips
+            prop, sep, val = prop_line.partition(':')
+            if sep:
+                declarations.append((sys.intern(prop.strip()), val.strip()))
+        return declarations
+
+    def _parsed_rules(self, css_text):
+        # Base variables and overrides walk the same text; parse it once
+        if self._parsed is None or self._parsed[0] != css_text:
+            self._parsed = (css_text, self._parse_css(css_text))
+        return self._parsed[1]
+
+    def _iter_declaration_blocks(self, rules):
+        """Yield (selector, declarations) for every innermost block in document order."""
+        for selector, declarations, children in rules:
+            if declarations is None:
+                yield from self._iter_declaration_blocks(children)
+            else:
+                yield selector, declarations
+
+    def _color_declarations(self, declarations):
+        """Return (prop, val, colors) for every literal --bs-* color declaration.
+
+        colors lists the color literals found in the value; a naked RGB value is its own single entry.
+        """
+        decls = []
+        for prop, val in declarations:
+            if not prop.startswith('--bs-') or 'var(' in val:
+                continue
+            if _NAKED_RGB_RE.match(val):
+                decls.append((prop, val, (val,)))
+            else:
+                colors = _COLOR_RE.findall(val)
+                if colors:
+                    decls.append((prop, val, colors))
+        return decls
 
     def extract_base_variables(self, css_text):
-        # Build mapping from ALL theme blocks (light and dark)
-        theme_blocks = re.findall(r'(?::root|\[data-bs-theme=[a-z]+\])[^{]*{([^}]*)}', css_text, flags=re.DOTALL)
-        for content in theme_blocks:
-            lines = content.split(';')
-            for line in lines:
-                line = line.strip()
-                if not line: continue
-                if ':' in line:
-                    prop, val = line.split(':', 1)
-                    prop = prop.strip()
-                    val = val.strip()
-                    is_color = re.search(self.color_regex, val)
-                    is_naked_rgb = re.match(self.naked_rgb_regex, val)
-                    
-                    if prop.startswith('--bs-') and (is_color or is_naked_rgb) and 'var(' not in val:
-                        # Normalize each color found in the value separately if it's not a naked RGB
-                        if is_naked_rgb:
-                            norm_val = self.normalize_color(val)
-                            if norm_val not in self.value_to_bs_name:
-                                self.value_to_bs_name[norm_val] = []
-                            self.value_to_bs_name[norm_val].append(prop)
-                        else:
-                            colors_in_val = re.findall(self.color_regex, val)
-                            for c in colors_in_val:
-                                norm_c = self.normalize_color(c)
-                                if norm_c not in self.value_to_bs_name:
-                                    self.value_to_bs_name[norm_c] = []
-                                self.value_to_bs_name[norm_c].append(prop)
+        # Build mapping from ALL theme blocks (light and dark); the first light root
+        # is kept for the base_vars output below
+        root_decls = None
+        for selector, declarations in self._iter_declaration_blocks(self._parsed_rules(css_text)):
+            if not self._THEME_SELECTOR_RE.search(selector):
+                continue
+            decls = self._color_declarations(declarations)
+            if root_decls is None and self._LIGHT_ROOT_SELECTOR_RE.search(selector):
+                root_decls = decls
+            for prop, val, colors in decls:
+                # Normalize each color found in the value separately
+                for c in colors:
+                    self.value_to_bs_name[normalize_color(c)].append(prop)
 
         # Only process the light root for base_vars output, but mapping is now built from both
-        root_match = re.search(r'(?::root|\[data-bs-theme=light\])[^{]*{([^}]*)}', css_text, flags=re.DOTALL)
-        if not root_match:
+        if root_decls is None:
             return ""
         
-        content = root_match.group(1)
-        lines = content.split(';')
         var_lines = []
-        for line in lines:
-            line = line.strip()
-            if not line: continue
-            if ':' in line:
-                prop, val = line.split(':', 1)
-                prop = prop.strip()
-                val = val.strip()
-                if prop.startswith('--bs-'):
-                    is_color = re.search(self.color_regex, val)
-                    is_naked_rgb = re.match(self.naked_rgb_regex, val)
-                    if (is_color or is_naked_rgb) and 'var(' not in val:
-                        new_val = self.process_value(val, ":root", prop)
-                        var_lines.append(f"  {prop}: {new_val};")
+        for prop, val, _ in root_decls:
+            new_val = self.process_value(val, ":root", prop)
+            var_lines.append(f"  {prop}: {new_val};")
                     
         if var_lines:
             # Inject high-contrast overrides that Bootstrap might set to 'inherit' or static values
@@ -314,45 +509,70 @@ class BootstrapExtractor:
             for role, default_rgb in bs_role_defaults.items():
                 var_base = f"--CTBS-DarkTheme{role}"
                 r, g, b = [int(x.strip()) for x in default_rgb.split(",")]
-                self.var_definitions.append(f"  {var_base}: #{r:02x}{g:02x}{b:02x};")
-                self.var_definitions.append(f"  {var_base}Rgb: {default_rgb};")
+                self._add_definition(var_base, f"#{r:02x}{g:02x}{b:02x}")
+                self._add_definition(f"{var_base}Rgb", default_rgb)
 
             return ":root {\n" + "\n".join(var_lines) + "\n}"
         return ""
 
+    # Glass background vars with a fixed CTBS counterpart; others are PascalCased
+    _GLASS_BS_VARS = {
+        'body-bg': 'BodyBg',
+        'card-bg': 'CardBg',
+        'modal-bg': 'ModalBg',
+        'alert-bg': 'AlertBg',
+        'navbar-bg': 'NavbarBg'
+    }
+    # Contextual selector -> role for the injected dark-mode alert and table rules
+    _ALERT_ROLES = {
+        ".alert-primary": "Primary",
+        ".alert-secondary": "Secondary",
+        ".alert-success": "Success",
+        ".alert-danger": "Danger",
+        ".alert-warning": "Warning",
+        ".alert-info": "Info",
+    }
+    _TABLE_ROLES = {
+        ".table-primary": "Primary", ".table-secondary": "Secondary",
+        ".table-success": "Success", ".table-info": "Info",
+        ".table-warning": "Warning", ".table-danger": "Danger",
+        ".table-light": "Light", ".table-dark": "Dark",
+    }
+    _TABLE_PROPS = [
+        ("color", "Color"), ("bg", "Bg"), ("border-color", "BorderColor"),
+        ("striped-bg", "StripedBg"), ("striped-color", "StripedColor"),
+        ("active-bg", "ActiveBg"), ("active-color", "ActiveColor"),
+        ("hover-bg", "HoverBg"), ("hover-color", "HoverColor"),
+    ]
+    # Dark-mode outline buttons; Light/Dark variants are rarely used in dark mode
+    _OUTLINE_ROLES = ["Primary", "Secondary", "Success", "Info", "Warning", "Danger"]
+    _OUTLINE_PROPS = [
+        ("color", "Color"), ("border-color", "BorderColor"),
+        ("hover-color", "HoverColor"), ("hover-bg", "HoverBg"), ("hover-border-color", "HoverBorderColor"),
+        ("active-color", "ActiveColor"), ("active-bg", "ActiveBg"), ("active-border-color", "ActiveBorderColor"),
+        ("disabled-color", "DisabledColor"), ("disabled-border-color", "DisabledBorderColor"),
+    ]
+    # One rule per role; only {role} and {rl} are filled in per call
+    _OUTLINE_RULE_TEMPLATE = (
+        "  [data-bs-theme=dark] .btn-outline-{rl} {{\n"
+        + "\n".join("    --bs-btn-%s: var(--CTBS-DarkThemeOutline{role}Btn%s);" % ps for ps in _OUTLINE_PROPS)
+        + "\n  }}"
+    )
+
     def extract_overrides(self, css_text):
         dark_role_rgb_injected = [False]  # mutable flag for nested function
 
-        def get_color_blocks(text, indent=""):
-            res = []
-            i = 0
-            while i < len(text):
-                start_brace = text.find('{', i)
-                if start_brace == -1:
-                    break
-                
-                selector = text[i:start_brace].strip()
-                if '}' in selector:
-                    selector = selector.split('}')[-1].strip()
-                
-                depth = 1
-                j = start_brace + 1
-                while j < len(text) and depth > 0:
-                    if text[j] == '{':
-                        depth += 1
-                    elif text[j] == '}':
-                        depth -= 1
-                    j += 1
-                
-                block_content = text[start_brace+1:j-1]
-                
+        def get_color_blocks(rules, indent=""):
+            # Every glass hit at this nesting level emits the same line
+            backdrop_line = f"{indent}  backdrop-filter: blur(var(--CTBS-GlassBlur));"
+            for selector, declarations, children in rules:
                 if selector.startswith('@'):
-                    inner = get_color_blocks(block_content, indent + "  ")
-                    if inner.strip():
-                        res.append(f"{indent}{selector} {{\n{inner}\n{indent}}}")
+                    inner = list(get_color_blocks(children, indent + "  "))
+                    if inner:
+                        yield f"{indent}{selector} {{"
+                        yield from inner
+                        yield f"{indent}}}"
                 else:
-                    properties = re.split(r';(?![^\(]*\))', block_content)
-                    
                     color_lines = []
                     
                     # Inject dynamic overrides for specific selectors (once only)
@@ -367,105 +587,76 @@ class BootstrapExtractor:
                                          ("Light","light"),("Dark","dark")]:
                             color_lines.append(f"{indent}  --bs-{rl}-rgb: var(--CTBS-DarkTheme{role}Rgb);")
 
-                    for prop_line in properties:
-                        prop_line = prop_line.strip()
-                        if not prop_line: continue
-                        if ':' in prop_line:
-                            parts = prop_line.split(':', 1)
-                            if len(parts) == 2:
-                                prop, val = parts
-                                prop = prop.strip()
-                                val = val.strip()
-                                
-                                # Process value to replace colors with vars
-                                new_val = self.process_value(val, selector, prop)
-                                
-                                is_glass_selector = any(gs in selector for gs in self.glass_selectors)
-                                is_glass_prop = prop == 'background-color' or prop in self.glass_properties
-                                
-                                if new_val != val:
-                                    # Glassmorphism injection
-                                    if is_glass_prop and is_glass_selector:
-                                        match = re.search(r'var\((--CTBS-[a-zA-Z0-9-]+)\)', new_val)
-                                        if match:
-                                            var_name = match.group(1)
-                                            # We use the -Rgb version of the variable
-                                            # IMPORTANT: Use rgba() for all glass components to respect --CTBS-GlassOpacity
-                                            new_val = f"rgba(var({var_name}Rgb), var(--CTBS-GlassOpacity))"
-                                            color_lines.append(f"{indent}  {prop}: {new_val};")
-                                            color_lines.append(f"{indent}  backdrop-filter: blur(var(--CTBS-GlassBlur));")
-                                        else:
-                                            color_lines.append(f"{indent}  {prop}: {new_val};")
-                                            color_lines.append(f"{indent}  backdrop-filter: blur(var(--CTBS-GlassBlur));")
-                                    else:
-                                        color_lines.append(f"{indent}  {prop}: {new_val};")
-                                elif is_glass_selector and is_glass_prop and 'var(--bs-' in val:
-                                    # Handle variables like --bs-body-bg or --bs-card-bg
-                                    # Convert them to our themed rgba version if possible
-                                    match = re.search(r'var\(--bs-([a-z-]+)\)', val)
-                                    if match:
-                                        bs_var = match.group(1)
-                                        # Map common body/card vars to CTBS counterparts
-                                        ctbs_map = {
-                                            'body-bg': 'BodyBg',
-                                            'card-bg': 'CardBg',
-                                            'modal-bg': 'ModalBg',
-                                            'alert-bg': 'AlertBg',
-                                            'navbar-bg': 'NavbarBg'
-                                        }
-                                        ctbs_base = ctbs_map.get(bs_var)
-                                        if not ctbs_base:
-                                            # Dynamic mapping for other variables like primary-bg-subtle -> PrimaryBgSubtle
-                                            ctbs_base = "".join([p.capitalize() for p in bs_var.split('-')])
-                                            
-                                        new_val = f"rgba(var(--CTBS-{ctbs_base}Rgb), var(--CTBS-GlassOpacity))"
-                                        color_lines.append(f"{indent}  {prop}: {new_val};")
-                                        color_lines.append(f"{indent}  backdrop-filter: blur(var(--CTBS-GlassBlur));")
-                                    else:
-                                        color_lines.append(f"{indent}  {prop}: {val};")
-                                        color_lines.append(f"{indent}  backdrop-filter: blur(var(--CTBS-GlassBlur));")
+                    is_glass_selector = self.is_glass_selector(selector)
+                    for prop, val in declarations:
+                        # Process value to replace colors with vars
+                        new_val = self.process_value(val, selector, prop)
+                        
+                        is_glass_prop = prop in self._glass_properties
+                        
+                        if new_val != val:
+                            # Glassmorphism injection
+                            if is_glass_prop and is_glass_selector:
+                                match = self._CTBS_VAR_RE.search(new_val)
+                                if match:
+                                    var_name = match.group(1)
+                                    # We use the -Rgb version of the variable
+                                    # IMPORTANT: Use rgba() for all glass components to respect --CTBS-GlassOpacity
+                                    new_val = f"rgba(var({var_name}Rgb), var(--CTBS-GlassOpacity))"
+                                    color_lines.append(f"{indent}  {prop}: {new_val};")
+                                    color_lines.append(backdrop_line)
+                                else:
+                                    color_lines.append(f"{indent}  {prop}: {new_val};")
+                                    color_lines.append(backdrop_line)
+                            else:
+                                color_lines.append(f"{indent}  {prop}: {new_val};")
+                        elif is_glass_selector and is_glass_prop and 'var(--bs-' in val:
+                            # Handle variables like --bs-body-bg or --bs-card-bg
+                            # Convert them to our themed rgba version if possible
+                            match = self._BS_VAR_RE.search(val)
+                            if match:
+                                bs_var = match.group(1)
+                                # Map common body/card vars to CTBS counterparts
+                                ctbs_base = self._GLASS_BS_VARS.get(bs_var)
+                                if not ctbs_base:
+                                    # Dynamic mapping for other variables like primary-bg-subtle -> PrimaryBgSubtle
+                                    ctbs_base = pascal_case(bs_var)
+                                    
+                                new_val = f"rgba(var(--CTBS-{ctbs_base}Rgb), var(--CTBS-GlassOpacity))"
+                                color_lines.append(f"{indent}  {prop}: {new_val};")
+                                color_lines.append(backdrop_line)
+                            else:
+                                color_lines.append(f"{indent}  {prop}: {val};")
+                                color_lines.append(backdrop_line)
                     if color_lines:
-                        res.append(f"{indent}{selector} {{\n" + "\n".join(color_lines) + f"\n{indent}}}")
+                        yield f"{indent}{selector} {{"
+                        yield from color_lines
+                        yield f"{indent}}}"
                         
                         # Inject Dark Mode overrides for glass selectors
                         # so backgrounds switch to DarkTheme* variants
-                        is_glass_selector = any(gs in selector for gs in self.glass_selectors)
                         is_dark_already = "data-bs-theme=dark" in selector
                         if is_glass_selector and not is_dark_already and not selector.startswith("@"):
                             dark_lines = []
                             for cl in color_lines:
                                 # Replace --CTBS-XyzRgb with --CTBS-DarkThemeXyzRgb in glass bg rules
                                 if "--CTBS-" in cl and "Rgb" in cl and "DarkTheme" not in cl:
-                                    dark_cl = re.sub(
-                                        r'--CTBS-([A-Za-z0-9]+)Rgb',
-                                        r'--CTBS-DarkTheme\1Rgb',
-                                        cl
-                                    )
+                                    dark_cl = self._CTBS_RGB_RE.sub(r'--CTBS-DarkTheme\1Rgb', cl)
                                     dark_lines.append(dark_cl)
                                 elif "backdrop-filter" in cl:
                                     dark_lines.append(cl)
                                 # Also handle --bs-card-bg with CTBS vars
                                 elif "--bs-card-bg" in cl and "--CTBS-" in cl and "DarkTheme" not in cl:
-                                    dark_cl = re.sub(
-                                        r'--CTBS-([A-Za-z0-9]+)Rgb',
-                                        r'--CTBS-DarkTheme\1Rgb',
-                                        cl
-                                    )
+                                    dark_cl = self._CTBS_RGB_RE.sub(r'--CTBS-DarkTheme\1Rgb', cl)
                                     dark_lines.append(dark_cl)
                             if dark_lines:
-                                res.append(f"{indent}[data-bs-theme=dark] {selector} {{\n" + "\n".join(dark_lines) + f"\n{indent}}}")
+                                yield f"{indent}[data-bs-theme=dark] {selector} {{"
+                                yield from dark_lines
+                                yield f"{indent}}}"
 
                         # Inject Dark Mode overrides for alerts using themed CTBS variables
                         if ".alert-" in selector and not selector.startswith("@"):
-                            role_map = {
-                                ".alert-primary": "Primary",
-                                ".alert-secondary": "Secondary",
-                                ".alert-success": "Success",
-                                ".alert-danger": "Danger",
-                                ".alert-warning": "Warning",
-                                ".alert-info": "Info",
-                            }
-                            for alert_sel, role in role_map.items():
+                            for alert_sel, role in self._ALERT_ROLES.items():
                                 if alert_sel in selector:
                                     dark_rule_lines = [
                                         f"{indent}  --bs-alert-color: var(--CTBS-DarkTheme{role}TextEmphasis);",
@@ -473,50 +664,43 @@ class BootstrapExtractor:
                                          f"{indent}  --bs-alert-bg: rgba(var(--CTBS-DarkTheme{role}BgSubtleRgb), var(--CTBS-GlassOpacity));",
                                         f"{indent}  backdrop-filter: blur(var(--CTBS-GlassBlur));",
                                     ]
-                                    res.append(f"{indent}[data-bs-theme=dark] {selector} {{\n" + "\n".join(dark_rule_lines) + f"\n{indent}}}")
+                                    yield f"{indent}[data-bs-theme=dark] {selector} {{"
+                                    yield from dark_rule_lines
+                                    yield f"{indent}}}"
                                     break
 
                         # Inject Dark Mode overrides for contextual tables
-                        _TABLE_PROPS = [
-                            ("color", "Color"), ("bg", "Bg"), ("border-color", "BorderColor"),
-                            ("striped-bg", "StripedBg"), ("striped-color", "StripedColor"),
-                            ("active-bg", "ActiveBg"), ("active-color", "ActiveColor"),
-                            ("hover-bg", "HoverBg"), ("hover-color", "HoverColor"),
-                        ]
                         if ".table-" in selector and not selector.startswith("@") and "data-bs-theme=dark" not in selector:
-                            table_role_map = {
-                                ".table-primary": "Primary", ".table-secondary": "Secondary",
-                                ".table-success": "Success", ".table-info": "Info",
-                                ".table-warning": "Warning", ".table-danger": "Danger",
-                                ".table-light": "Light", ".table-dark": "Dark",
-                            }
-                            for table_sel, role in table_role_map.items():
+                            for table_sel, role in self._TABLE_ROLES.items():
                                 if table_sel in selector:
                                     dark_rule_lines = [
                                         f"{indent}  --bs-table-{css}: var(--CTBS-DarkTheme{role}Table{suffix});"
-                                        for css, suffix in _TABLE_PROPS
+                                        for css, suffix in self._TABLE_PROPS
                                     ]
-                                    res.append(f"{indent}[data-bs-theme=dark] {selector} {{\n" + "\n".join(dark_rule_lines) + f"\n{indent}}}")
+                                    yield f"{indent}[data-bs-theme=dark] {selector} {{"
+                                    yield from dark_rule_lines
+                                    yield f"{indent}}}"
                                     break
 
                         # Inject progress bar track override and dark-mode progress vars
                         if ".progress" in selector and ".progress-bar" not in selector and not selector.startswith("@") and "data-bs-theme=dark" not in selector:
                             # Light-mode: override track bg to a subtle background
-                            res.append(f"{indent}.progress,\n{indent}.progress-stacked {{\n"
-                                        f"{indent}  --bs-progress-bg: var(--CTBS-SecondaryBgSubtle);\n"
-                                        f"{indent}}}")
+                            yield f"{indent}.progress,\n{indent}.progress-stacked {{"
+                            yield f"{indent}  --bs-progress-bg: var(--CTBS-SecondaryBgSubtle);"
+                            yield f"{indent}}}"
                             # Dark-mode: override track bg + bar fill + bar text
                             dark_progress_lines = [
                                 f"{indent}  --bs-progress-bg: var(--CTBS-DarkThemeSecondaryBgSubtle);",
                                 f"{indent}  --bs-progress-bar-bg: var(--CTBS-DarkThemeProgressBarBg);",
                                 f"{indent}  --bs-progress-bar-color: var(--CTBS-DarkThemeProgressBarColor);",
                             ]
-                            res.append(f"{indent}[data-bs-theme=dark] .progress,\n{indent}[data-bs-theme=dark] .progress-stacked {{\n" + "\n".join(dark_progress_lines) + f"\n{indent}}}")
+                            yield f"{indent}[data-bs-theme=dark] .progress,\n{indent}[data-bs-theme=dark] .progress-stacked {{"
+                            yield from dark_progress_lines
+                            yield f"{indent}}}"
                 
-                i = j
-            return "\n".join(res)
 
-        return get_color_blocks(css_text)
+        # The walk yields output lines; join them once at the top
+        return "\n".join(get_color_blocks(self._parsed_rules(css_text)))
 
     def accessibility_tail_overrides(self):
         roles = ["Primary", "Secondary", "Success", "Info", "Warning", "Danger", "Light", "Dark"]
@@ -539,72 +723,15 @@ class BootstrapExtractor:
         text_bg_dark = "\n".join(text_bg_dark_lines)
 
         # --- Dark-mode outline button overrides ---
-        # Outline buttons exclude Light/Dark variants (rarely used in dark mode)
-        outline_roles = ["Primary", "Secondary", "Success", "Info", "Warning", "Danger"]
-        _OUTLINE_PROPS = [
-            ("color", "Color"), ("border-color", "BorderColor"),
-            ("hover-color", "HoverColor"), ("hover-bg", "HoverBg"), ("hover-border-color", "HoverBorderColor"),
-            ("active-color", "ActiveColor"), ("active-bg", "ActiveBg"), ("active-border-color", "ActiveBorderColor"),
-            ("disabled-color", "DisabledColor"), ("disabled-border-color", "DisabledBorderColor"),
-        ]
-        outline_dark_lines = []
-        for role in outline_roles:
-            rl = role.lower()
-            props = "\n".join(f"    --bs-btn-{p}: var(--CTBS-DarkThemeOutline{role}Btn{s});" for p, s in _OUTLINE_PROPS)
-            outline_dark_lines.append(f"  [data-bs-theme=dark] .btn-outline-{rl} {{\n{props}\n  }}")
-        outline_dark = "\n".join(outline_dark_lines)
+        outline_dark = "\n".join(
+            self._OUTLINE_RULE_TEMPLATE.format(role=role, rl=role.lower()) for role in self._OUTLINE_ROLES
+        )
 
-        return f"""
-
-/* 3. ACCESSIBILITY SAFETY OVERRIDES (AAA-oriented) */
-:root,
-[data-bs-theme=light],
-[data-bs-theme=dark] {{
-  --bs-secondary-color: var(--CTBS-SecondaryColor);
-}}
-
-.text-body-secondary,
-.nav-link.disabled,
-.page-link.disabled,
-.page-item.disabled .page-link {{
-  color: var(--bs-body-color) !important;
-  opacity: 1;
-}}
-
-.pagination .page-link {{
-  color: var(--bs-body-color);
-  background-color: var(--bs-body-bg);
-  border-color: var(--bs-border-color);
-}}
-
-.pagination .page-item.active .page-link {{
-  color: var(--bs-body-bg);
-  background-color: var(--bs-body-color);
-  border-color: var(--bs-body-color);
-}}
-
-.pagination .page-item.disabled .page-link {{
-  color: var(--bs-body-color) !important;
-  background-color: var(--bs-body-bg);
-  opacity: 1;
-}}
-
-/* 4. TEXT-BG UTILITY CONTRAST OVERRIDES */
-/* Override Bootstrap !important color in .text-bg-* with themed btn-color */
-{text_bg_light}
-
-{text_bg_dark}
-
-/* Disable glass overlays inside colored utility cards so text-bg contrast is reliable */
-[class*="text-bg-"] .card-header,
-[class*="text-bg-"] .card-footer {{
-  background-color: transparent;
-  backdrop-filter: none;
-}}
-
-/* 5. DARK-MODE OUTLINE BUTTON OVERRIDES */
-{outline_dark}
-"""
+        return _TAIL_TEMPLATE.format_map({
+            "text_bg_light": text_bg_light,
+            "text_bg_dark": text_bg_dark,
+            "outline_dark": outline_dark,
+        })
 
 def main():
     parser = argparse.ArgumentParser(description="Extract color data from Bootstrap CSS into semantic variable and override files")
@@ -618,11 +745,11 @@ def main():
         print(f"Error: {args.input} not found.")
         sys.exit(1)
         
-    with open(args.input, 'r', encoding='utf-8') as f:
+    with open(args.input, 'rb') as f:
         content = f.read()
     
-    # Remove comments once
-    content = re.sub(r'/\*.*?\*/', '', content, flags=re.DOTALL)
+    # Remove comments once, on the raw bytes, and decode what is left
+    content = _COMMENT_RE.sub(b'', content).decode('utf-8')
     
     extractor = BootstrapExtractor()
     
@@ -634,32 +761,33 @@ def main():
     overrides = extractor.extract_overrides(content)
     
     # Generate the internal variables block
-    # Sort var_definitions for consistent output
-    extractor.var_definitions.sort()
-    internal_vars = ":root {\n" + "\n".join(extractor.var_definitions) + "\n}\n"
+    # Sort by variable name (the dict key) for consistent output
+    internal_vars = ":root {\n" + "\n".join(
+        line for _, line in sorted(extractor.var_definitions.items())
+    ) + "\n}\n"
     
     # Write variables file
     with open(args.vars, 'w', encoding='utf-8') as f:
-        f.write("/* BOOTSTRAP SEMANTIC INTERNAL COLOR MAPPING */\n")
-        f.write(f"/* Generated from {args.input} */\n\n")
-        f.write("/* These are the literal colors found in the original source, mapped to semantic names */\n")
-        f.write(internal_vars)
+        f.write("".join([
+            "/* BOOTSTRAP SEMANTIC INTERNAL COLOR MAPPING */\n",
+            f"/* Generated from {args.input} */\n\n",
+            "/* These are the literal colors found in the original source, mapped to semantic names */\n",
+            internal_vars,
+        ]))
     
     # Write overrides file
+    parts = [
+        "/* BOOTSTRAP COLOR OVERRIDES */\n",
+        f"/* Generated from {args.input} */\n",
+        f"/* Requires variables from {os.path.basename(args.vars)} */\n\n",
+    ]
+    if base_vars:
+        parts += ["/* 1. BASE BOOTSTRAP VARIABLE OVERRIDES */\n", base_vars, "\n\n"]
+    if overrides:
+        parts += ["/* 2. COMPONENT-SPECIFIC OVERRIDES */\n", overrides]
+    parts.append(extractor.accessibility_tail_overrides())
     with open(args.output, 'w', encoding='utf-8') as f:
-        f.write("/* BOOTSTRAP COLOR OVERRIDES */\n")
-        f.write(f"/* Generated from {args.input} */\n")
-        f.write(f"/* Requires variables from {os.path.basename(args.vars)} */\n\n")
-        
-        if base_vars:
-            f.write("/* 1. BASE BOOTSTRAP VARIABLE OVERRIDES */\n")
-            f.write(base_vars)
-            f.write("\n\n")
-            
-        if overrides:
-            f.write("/* 2. COMPONENT-SPECIFIC OVERRIDES */\n")
-            f.write(overrides)
-        f.write(extractor.accessibility_tail_overrides())
+        f.write("".join(parts))
         
     print(f"Success!")
     print(f"  Variables written to: {args.vars}")
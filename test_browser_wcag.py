@@ -1,6 +1,7 @@
 import os
 import threading
 from functools import partial
+from itertools import islice
 from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
@@ -31,596 +32,578 @@ def preview_url():
         thread.join(timeout=3)
 
 
-def test_rendered_wcag_contrast(preview_url):
+@pytest.fixture(scope="session")
+def browser():
     pytest.importorskip("playwright.sync_api")
     from playwright.sync_api import Error, sync_playwright
 
-    normal_text_min = float(os.environ.get("WCAG_AAA_NORMAL_MIN", "7.0"))
-    large_text_min = float(os.environ.get("WCAG_AAA_LARGE_MIN", "4.5"))
+    with sync_playwright() as pw:
+        try:
+            browser = pw.chromium.launch(channel="chromium", headless=True)
+        except Error:
+            try:
+                browser = pw.chromium.launch(headless=True)
+            except Error as exc:
+                pytest.skip(f"Chromium is not available for Playwright: {exc}")
+        yield browser
+        browser.close()
 
-    audit_script = """
-    ({ normalTextMin, largeTextMin }) => {
-      function parseColor(raw) {
-        if (!raw || raw === 'transparent') return { r: 0, g: 0, b: 0, a: 0 };
-        const m = raw.match(/rgba?\\(([^)]+)\\)/i);
-        if (!m) return { r: 0, g: 0, b: 0, a: 0 };
-        const p = m[1].split(',').map(x => x.trim());
-        return {
-          r: Number(p[0]),
-          g: Number(p[1]),
-          b: Number(p[2]),
-          a: p[3] === undefined ? 1 : Number(p[3])
-        };
-      }
 
-      function blend(top, bottom) {
-        const a = top.a + bottom.a * (1 - top.a);
-        if (a <= 0) return { r: 0, g: 0, b: 0, a: 0 };
-        return {
-          r: (top.r * top.a + bottom.r * bottom.a * (1 - top.a)) / a,
-          g: (top.g * top.a + bottom.g * bottom.a * (1 - top.a)) / a,
-          b: (top.b * top.a + bottom.b * bottom.a * (1 - top.a)) / a,
-          a
-        };
+# Images, fonts and media play no part in computed colours; aborting them keeps
+# page loads and theme switches from waiting on downloads
+_SKIPPED_RESOURCES = "**/*.{png,jpg,jpeg,gif,webp,svg,woff,woff2,ttf,otf,mp4}"
+
+
+def _new_context(browser):
+    context = browser.new_context(viewport={"width": 1440, "height": 2200})
+    context.route(_SKIPPED_RESOURCES, lambda route: route.abort())
+    return context
+
+
+def _open_preview(page, url):
+    # The parser-blocking bundle script after the stylesheet links means every
+    # stylesheet has applied by DOMContentLoaded; no need to wait for network idle
+    page.goto(url, wait_until="domcontentloaded")
+    page.wait_for_selector("#themeSelect option", state="attached")
+
+
+# Shared in-page helpers, installed once per page with add_init_script so each
+# scenario only sends a short call instead of re-parsing the whole audit.
+_AUDIT_LIB_JS = """
+(() => {
+  // Computed colours serialise as 'rgb(r, g, b)' or 'rgba(r, g, b, a)'; scan
+  // for that form directly instead of running a regex per element.
+  function parseColor(raw) {
+    const start = raw ? raw.indexOf('rgb') : -1;
+    if (start < 0) return { r: 0, g: 0, b: 0, a: 0 };
+    let open = start + 3;
+    if (raw.charCodeAt(open) === 97 /* 'a' */) open += 1;
+    const close = raw.indexOf(')', open);
+    if (raw.charCodeAt(open) !== 40 /* '(' */ || close <= open + 1) return { r: 0, g: 0, b: 0, a: 0 };
+    const p = raw.slice(open + 1, close).split(',');
+    return {
+      r: Number(p[0]),
+      g: Number(p[1]),
+      b: Number(p[2]),
+      a: p[3] === undefined ? 1 : Number(p[3])
+    };
+  }
+
+  function blend(top, bottom) {
+    const a = top.a + bottom.a * (1 - top.a);
+    if (a <= 0) return { r: 0, g: 0, b: 0, a: 0 };
+    return {
+      r: (top.r * top.a + bottom.r * bottom.a * (1 - top.a)) / a,
+      g: (top.g * top.a + bottom.g * bottom.a * (1 - top.a)) / a,
+      b: (top.b * top.a + bottom.b * bottom.a * (1 - top.a)) / a,
+      a
+    };
+  }
+
+  function linearize(c) {
+    const v = c / 255;
+    return v <= 0.03928 ? v / 12.92 : Math.pow((v + 0.055) / 1.055, 2.4);
+  }
+
+  // Computed colours have integer channels; blended backgrounds usually do not,
+  // so only those fall back to the formula.
+  const SRGB_LUT = Array.from({ length: 256 }, (_, i) => linearize(i));
+
+  function srgb(c) {
+    return Number.isInteger(c) && c >= 0 && c <= 255 ? SRGB_LUT[c] : linearize(c);
+  }
+
+  function luminance(color) {
+    return 0.2126 * srgb(color.r) + 0.7152 * srgb(color.g) + 0.0722 * srgb(color.b);
+  }
+
+  function contrastRatio(fg, bg) {
+    const l1 = luminance(fg);
+    const l2 = luminance(bg);
+    return l1 > l2 ? (l1 + 0.05) / (l2 + 0.05) : (l2 + 0.05) / (l1 + 0.05);
+  }
+
+  function isVisible(el, style = getComputedStyle(el)) {
+    if (style.visibility === 'hidden' || style.display === 'none') return false;
+    const rect = el.getBoundingClientRect();
+    return rect.width > 0 && rect.height > 0;
+  }
+
+  function selector(el) {
+    if (el.id) return '#' + el.id;
+    const parts = [];
+    let node = el;
+    while (node && node.nodeType === 1 && parts.length < 5) {
+      const cls = (node.className || '').toString().trim().split(/\\s+/).filter(Boolean).slice(0, 2).join('.');
+      let part = node.tagName.toLowerCase();
+      if (cls) part += '.' + cls;
+      const parent = node.parentElement;
+      if (parent) {
+        const siblings = Array.from(parent.children).filter(c => c.tagName === node.tagName);
+        if (siblings.length > 1) part += `:nth-of-type(${siblings.indexOf(node) + 1})`;
       }
-
-      function srgb(c) {
-        const v = c / 255;
-        return v <= 0.03928 ? v / 12.92 : Math.pow((v + 0.055) / 1.055, 2.4);
+      parts.unshift(part);
+      node = parent;
+    }
+    return parts.join(' > ');
+  }
+
+  const WHITE = { r: 255, g: 255, b: 255, a: 1 };
+
+  // Blend el's background over its parent's resolved one.  Pass one cache per
+  // audit call: ancestors are then resolved once instead of once per element,
+  // and a theme or mode switch never sees stale colours.
+  function resolveBackground(el, cache = new WeakMap()) {
+    if (!el) return WHITE;
+    let result = cache.get(el);
+    if (result === undefined) {
+      const own = parseColor(getComputedStyle(el).backgroundColor);
+      const below = resolveBackground(el.parentElement, cache);
+      result = own.a > 0 ? blend(own, below) : below;
+      cache.set(el, result);
+    }
+    return result;
+  }
+
+  // Yields [element, first non-blank text child, computed style] in document
+  // order.  display:none subtrees are pruned whole: nothing inside them renders.
+  // visibility and zero size are left to isVisible, since descendants can
+  // override the former and overflow the latter.
+  function* textElements(el = document.body) {
+    const style = getComputedStyle(el);
+    if (style.display === 'none') return;
+    // One pass over childNodes keeps the order of a text-node walk: an element
+    // comes out at its first text node, after any children that precede it.
+    let yielded = false;
+    for (const c of el.childNodes) {
+      if (c.nodeType === 1) {
+        yield* textElements(c);
+      } else if (!yielded && c.nodeType === 3 && c.textContent.trim()) {
+        yielded = true;
+        yield [el, c, style];
       }
+    }
+  }
+
+  function barLabel(bar) {
+    const classes = Array.from(bar.classList)
+      .filter(c => c !== 'progress-bar' && c !== 'progress-bar-striped' && c !== 'progress-bar-animated')
+      .join('.');
+    return classes || 'default';
+  }
+
+  window.__wcagAudit = ({ normalTextMin, largeTextMin }) => {
+    const failures = [];
+    const seen = new Set();
+    const bgCache = new WeakMap();
+
+    for (const [el, node, style] of textElements()) {
+      if (!isVisible(el, style)) continue;
+      const key = selector(el);
+      if (seen.has(key)) continue;
+      seen.add(key);
 
-      function luminance(color) {
-        return 0.2126 * srgb(color.r) + 0.7152 * srgb(color.g) + 0.0722 * srgb(color.b);
+      const fg = parseColor(style.color);
+      const bg = resolveBackground(el, bgCache);
+      const ratio = contrastRatio(fg, bg);
+      const fontSize = Number(style.fontSize.replace('px', ''));
+      const fontWeight = Number(style.fontWeight) || 400;
+      const isLarge = fontSize >= 24 || (fontSize >= 18.66 && fontWeight >= 700);
+      const threshold = isLarge ? largeTextMin : normalTextMin;
+
+      if (ratio < threshold) {
+        failures.push({
+          selector: key,
+          text: node.textContent.trim().replace(/\\s+/g, ' ').slice(0, 80),
+          ratio: Number(ratio.toFixed(2)),
+          required: threshold
+        });
       }
+    }
 
-      function contrastRatio(fg, bg) {
-        const l1 = luminance(fg);
-        const l2 = luminance(bg);
-        const light = Math.max(l1, l2);
-        const dark = Math.min(l1, l2);
-        return (light + 0.05) / (dark + 0.05);
+    // Return the 20 worst as parallel columns rather than one object each,
+    // which keeps the payload sent back over CDP small
+    failures.sort((a, b) => a.ratio - b.ratio);
+    const worst = failures.slice(0, 20);
+    return {
+      selectors: worst.map(f => f.selector),
+      texts: worst.map(f => f.text),
+      ratios: worst.map(f => f.ratio),
+      required: worst.map(f => f.required)
+    };
+  };
+
+  window.__contrastFor = (sel) => {
+    const el = document.querySelector(sel);
+    if (!el) return null;
+    const style = getComputedStyle(el);
+    const fg = parseColor(style.color);
+    const bg = resolveBackground(el);
+    return Number(contrastRatio(fg, bg).toFixed(2));
+  };
+
+  window.__progressAudit = (threshold) => {
+    const failures = [];
+    const bars = document.querySelectorAll('.progress-bar');
+    const bgCache = new WeakMap();
+
+    for (const bar of bars) {
+      // Skip bg-light / bg-dark: inherently low-contrast in matching mode
+      if (bar.classList.contains('bg-light') || bar.classList.contains('bg-dark')) continue;
+
+      const rect = bar.getBoundingClientRect();
+      if (rect.width <= 0 || rect.height <= 0) continue;
+
+      const barBg = resolveBackground(bar, bgCache);
+      const track = bar.closest('.progress');
+      if (!track) continue;
+      const trackBg = resolveBackground(track, bgCache);
+
+      const ratio = contrastRatio(barBg, trackBg);
+      if (ratio < threshold) {
+        failures.push({
+          label: barLabel(bar),
+          ratio: Number(ratio.toFixed(2)),
+          barColor: `rgb(${Math.round(barBg.r)},${Math.round(barBg.g)},${Math.round(barBg.b)})`,
+          trackColor: `rgb(${Math.round(trackBg.r)},${Math.round(trackBg.g)},${Math.round(trackBg.b)})`
+        });
       }
+    }
 
-      function isVisible(el) {
-        const style = getComputedStyle(el);
-        if (style.visibility === 'hidden' || style.display === 'none') return false;
-        const rect = el.getBoundingClientRect();
-        return rect.width > 0 && rect.height > 0;
+    failures.sort((a, b) => a.ratio - b.ratio);
+    return failures;
+  };
+
+  window.__runAllScenarios = async (themes, opts) => {
+    const select = document.getElementById('themeSelect');
+    const link = document.getElementById('themeStylesheet');
+    const results = [];
+    for (const theme of themes) {
+      if (select.value !== theme) {
+        // Bounded like Playwright's default wait, so a swap that never fires
+        // load or error fails the sweep instead of hanging it
+        let timer;
+        const loaded = Promise.race([
+          new Promise(resolve => {
+            link.addEventListener('load', resolve, { once: true });
+            link.addEventListener('error', resolve, { once: true });
+          }),
+          new Promise((_, reject) => {
+            timer = setTimeout(() => reject(new Error(`${theme}: theme stylesheet did not load`)), 30000);
+          })
+        ]);
+        select.value = theme;
+        select.dispatchEvent(new Event('change', { bubbles: true }));
+        await loaded;
+        clearTimeout(timer);
       }
-
-      function selector(el) {
-        if (el.id) return '#' + el.id;
-        const parts = [];
-        let node = el;
-        while (node && node.nodeType === 1 && parts.length < 5) {
-          const cls = (node.className || '').toString().trim().split(/\\s+/).filter(Boolean).slice(0, 2).join('.');
-          let part = node.tagName.toLowerCase();
-          if (cls) part += '.' + cls;
-          const parent = node.parentElement;
-          if (parent) {
-            const siblings = Array.from(parent.children).filter(c => c.tagName === node.tagName);
-            if (siblings.length > 1) part += `:nth-of-type(${siblings.indexOf(node) + 1})`;
-          }
-          parts.unshift(part);
-          node = parent;
-        }
-        return parts.join(' > ');
+      for (const mode of ['light', 'dark']) {
+        document.documentElement.setAttribute('data-bs-theme', mode);
+        if (typeof updateTheme === 'function') updateTheme();
+        await new Promise(resolve => requestAnimationFrame(() => requestAnimationFrame(resolve)));
+        results.push({ theme, mode, failures: window.__wcagAudit(opts) });
       }
-
-      function resolveBackground(el) {
-        let result = { r: 255, g: 255, b: 255, a: 1 };
-        let node = el;
-        const layers = [];
-        while (node) {
-          const c = parseColor(getComputedStyle(node).backgroundColor);
-          if (c.a > 0) layers.push(c);
-          node = node.parentElement;
-        }
-        for (let i = layers.length - 1; i >= 0; i -= 1) {
-          result = blend(layers[i], result);
-        }
-        return result;
+    }
+    return results;
+  };
+
+  // __styleSettled drops to false on a data-bs-theme or stylesheet href change
+  // and comes back two animation frames after the last change (and after any
+  // swapped stylesheet has loaded), so tests can wait for it instead of sleeping.
+  window.__styleSettled = true;
+  let generation = 0;
+  // link -> token of its newest href change.  A sheet replaced before it
+  // loads never fires load/error, so only the current token may clear it.
+  const pendingSheets = new Map();
+
+  function settleLater() {
+    const gen = ++generation;
+    window.__styleSettled = false;
+    requestAnimationFrame(() => requestAnimationFrame(() => {
+      if (gen === generation && pendingSheets.size === 0) window.__styleSettled = true;
+    }));
+  }
+
+  function awaitSheet(link) {
+    const token = {};
+    pendingSheets.set(link, token);
+    const done = () => {
+      link.removeEventListener('load', done);
+      link.removeEventListener('error', done);
+      if (pendingSheets.get(link) !== token) return;
+      pendingSheets.delete(link);
+      settleLater();
+    };
+    link.addEventListener('load', done);
+    link.addEventListener('error', done);
+  }
+
+  new MutationObserver(records => {
+    for (const rec of records) {
+      if (rec.attributeName === 'href' && rec.target.tagName === 'LINK'
+          && rec.oldValue !== rec.target.getAttribute('href')) {
+        awaitSheet(rec.target);
       }
+    }
+    settleLater();
+  // Init scripts run before <html> exists, so watch the document itself
+  }).observe(document, {
+    attributes: true,
+    attributeOldValue: true,
+    subtree: true,
+    attributeFilter: ['data-bs-theme', 'href']
+  });
+})();
+"""
+
+
+# Page setup shared by every audit: glass fully opaque, no transitions, no
+# background image behind body
+_PREP_JS = """
+() => {
+  const opacityRange = document.getElementById('opacityRange');
+  if (opacityRange) {
+    opacityRange.value = opacityRange.max || '1';
+    opacityRange.dispatchEvent(new Event('input', { bubbles: true }));
+  }
+
+  const motion = document.createElement('style');
+  motion.id = 'test-disable-motion';
+  motion.innerHTML = '* { transition: none !important; animation: none !important; }';
+  document.head.appendChild(motion);
+
+  const style = document.createElement('style');
+  style.id = 'test-no-bg-image';
+  style.innerHTML = 'body::before { background-image: none !important; }';
+  document.head.appendChild(style);
+  if (typeof updateTheme === 'function') updateTheme();
+}
+"""
+
+
+def _open_audit_page(browser, url):
+    context = _new_context(browser)
+    page = context.new_page()
+    page.add_init_script(script=_AUDIT_LIB_JS)
+    _open_preview(page, url)
+    page.evaluate(_PREP_JS)
+    return context, page
 
-      function textNodes() {
-        const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
-        const nodes = [];
-        while (walker.nextNode()) {
-          const n = walker.currentNode;
-          if (!n.textContent || !n.textContent.trim()) continue;
-          if (!n.parentElement) continue;
-          nodes.push(n);
-        }
-        return nodes;
-      }
 
-      const failures = [];
-      const seen = new Set();
-
-      for (const node of textNodes()) {
-        const el = node.parentElement;
-        if (!el || !isVisible(el)) continue;
-        const key = selector(el);
-        if (seen.has(key)) continue;
-        seen.add(key);
-
-        const style = getComputedStyle(el);
-        const fg = parseColor(style.color);
-        const bg = resolveBackground(el);
-        const ratio = contrastRatio(fg, bg);
-        const fontSize = Number(style.fontSize.replace('px', ''));
-        const fontWeight = Number(style.fontWeight) || 400;
-        const isLarge = fontSize >= 24 || (fontSize >= 18.66 && fontWeight >= 700);
-        const threshold = isLarge ? largeTextMin : normalTextMin;
-
-        if (ratio < threshold) {
-          failures.push({
-            selector: key,
-            text: node.textContent.trim().replace(/\\s+/g, ' ').slice(0, 80),
-            ratio: Number(ratio.toFixed(2)),
-            required: threshold
-          });
+@pytest.fixture(scope="module")
+def prepared_page(browser, preview_url):
+    context, page = _open_audit_page(browser, preview_url)
+    try:
+        yield page
+    finally:
+        context.close()
+
+
+@pytest.fixture
+def page(prepared_page):
+    # The tests share one loaded page; put it back the way a fresh load leaves
+    # it (first theme, light mode, nothing saved) and let the styles settle,
+    # so no test depends on what the previous one selected
+    prepared_page.evaluate(
+        """
+        () => {
+          const select = document.getElementById('themeSelect');
+          select.value = select.options[0].value;
+          document.documentElement.setAttribute('data-bs-theme', 'light');
+          if (typeof setMode === 'function') setMode('light');
+          if (typeof updateTheme === 'function') updateTheme();
+          localStorage.removeItem('ct-theme');
+          localStorage.removeItem('ct-mode');
         }
-      }
-
-      failures.sort((a, b) => a.ratio - b.ratio);
-      return failures.slice(0, 20);
-    }
-    """
+        """
+    )
+    prepared_page.wait_for_function("() => window.__styleSettled === true")
+    return prepared_page
 
-    scenarios = []
 
-    def iterate_theme_modes(page):
-        themes = page.eval_on_selector_all("#themeSelect option", "opts => opts.map(o => o.value)")
-        for theme in themes:
-            page.select_option("#themeSelect", theme)
-            page.wait_for_function(
-                "theme => document.getElementById('themeStylesheet').getAttribute('href').includes(`/` + theme + `/theme.css`)",
-                arg=theme,
-            )
-
-            for mode in ("light", "dark"):
-                page.evaluate(
-                    """
-                    (mode) => {
-                      document.documentElement.setAttribute('data-bs-theme', mode);
-                      if (typeof updateTheme === 'function') updateTheme();
-                    }
-                    """,
-                    mode,
-                )
-                page.wait_for_function(
-                    "mode => document.documentElement.getAttribute('data-bs-theme') === mode",
-                    arg=mode,
-                )
-                page.wait_for_timeout(180)
-                yield theme, mode
+def test_rendered_wcag_contrast(browser, page, preview_url):
+    normal_text_min = float(os.environ.get("WCAG_AAA_NORMAL_MIN", "7.0"))
+    large_text_min = float(os.environ.get("WCAG_AAA_LARGE_MIN", "4.5"))
+    opts = {"normalTextMin": normal_text_min, "largeTextMin": large_text_min}
 
-    with sync_playwright() as pw:
-        browser = None
-        try:
-            browser = pw.chromium.launch(channel="chromium", headless=True)
-        except Error:
-            try:
-                browser = pw.chromium.launch(headless=True)
-            except Error as exc:
-                pytest.skip(f"Chromium is not available for Playwright: {exc}")
+    scenarios = []
 
-        if browser is None:
-            pytest.skip("Chromium is not available for Playwright")
-        assert browser is not None
-
-        page = browser.new_page(viewport={"width": 1440, "height": 2200})
-        page.goto(preview_url, wait_until="networkidle")
-        page.evaluate(
-            """
-            () => {
-              const opacityRange = document.getElementById('opacityRange');
-              if (opacityRange) {
-                opacityRange.value = opacityRange.max || '1';
-                opacityRange.dispatchEvent(new Event('input', { bubbles: true }));
-              }
-
-              const motion = document.createElement('style');
-              motion.id = 'test-disable-motion';
-              motion.innerHTML = '* { transition: none !important; animation: none !important; }';
-              document.head.appendChild(motion);
-
-              const style = document.createElement('style');
-              style.id = 'test-no-bg-image';
-              style.innerHTML = 'body::before { background-image: none !important; }';
-              document.head.appendChild(style);
-              if (typeof updateTheme === 'function') updateTheme();
-            }
-            """
-        )
+    themes = page.eval_on_selector_all("#themeSelect option", "opts => opts.map(o => o.value)")
 
-        for theme, mode in iterate_theme_modes(page):
-            failures = page.evaluate(
-                audit_script,
-                {"normalTextMin": normal_text_min, "largeTextMin": large_text_min},
+    # Themes are independent, so split them across a few pages in separate
+    # contexts.  Each sweep is started without awaiting it and collected
+    # afterwards, which lets the pages run side by side from this one thread.
+    workers = max(1, min(len(themes), os.cpu_count() or 1, 4))
+    pages = [page]
+    contexts = []
+    try:
+        for _ in range(workers - 1):
+            context, extra = _open_audit_page(browser, preview_url)
+            contexts.append(context)
+            pages.append(extra)
+
+        for i, p in enumerate(pages):
+            p.evaluate(
+                "([themes, opts]) => { window.__sweep = window.__runAllScenarios(themes, opts); }",
+                [themes[i::workers], opts],
             )
-            if failures:
-                sample = "; ".join(
-                    f"{item['ratio']}<{item['required']} at {item['selector']} ('{item['text']}')"
-                    for item in failures[:5]
-                )
-                scenarios.append(f"{theme}/{mode}: {sample}")
-
-        browser.close()
+        results = [result for p in pages for result in p.evaluate("() => window.__sweep")]
+    finally:
+        for context in contexts:
+            context.close()
+
+    results.sort(key=lambda result: themes.index(result["theme"]))
+    for result in results:
+        theme, mode, failures = result["theme"], result["mode"], result["failures"]
+        if failures["ratios"]:
+            rows = zip(failures["ratios"], failures["required"], failures["selectors"], failures["texts"])
+            sample = "; ".join(
+                f"{ratio}<{required} at {selector} ('{text}')"
+                for ratio, required, selector, text in islice(rows, 5)
+            )
+            scenarios.append(f"{theme}/{mode}: {sample}")
 
     assert not scenarios, "Rendered WCAG contrast failures detected:\n" + "\n".join(scenarios)
 
 
-def test_can_click_through_theme_and_mode_controls(preview_url):
-    pytest.importorskip("playwright.sync_api")
-    from playwright.sync_api import Error, sync_playwright
+def test_can_click_through_theme_and_mode_controls(page):
+    themes = page.eval_on_selector_all("#themeSelect option", "opts => opts.map(o => o.value)")
+    assert themes, "No themes found in #themeSelect"
 
-    with sync_playwright() as pw:
-        try:
-            browser = pw.chromium.launch(channel="chromium", headless=True)
-        except Error:
-            browser = pw.chromium.launch(headless=True)
-
-        page = browser.new_page(viewport={"width": 1440, "height": 2200})
-        page.goto(preview_url, wait_until="networkidle")
-        page.evaluate(
-            """
-            () => {
-              const opacityRange = document.getElementById('opacityRange');
-              if (opacityRange) {
-                opacityRange.value = opacityRange.max || '1';
-                opacityRange.dispatchEvent(new Event('input', { bubbles: true }));
-              }
-            }
-            """
+    visited = 0
+    for theme in themes:
+        page.select_option("#themeSelect", theme)
+        page.wait_for_function(
+            "theme => document.getElementById('themeStylesheet').getAttribute('href').includes(`/` + theme + `/theme.css`)",
+            arg=theme,
         )
 
-        themes = page.eval_on_selector_all("#themeSelect option", "opts => opts.map(o => o.value)")
-        assert themes, "No themes found in #themeSelect"
-
-        visited = 0
-        for theme in themes:
-            page.select_option("#themeSelect", theme)
+        for mode in ("dark", "light"):
+            page.click("#themeToggle")
             page.wait_for_function(
-                "theme => document.getElementById('themeStylesheet').getAttribute('href').includes(`/` + theme + `/theme.css`)",
-                arg=theme,
+                "mode => document.documentElement.getAttribute('data-bs-theme') === mode",
+                arg=mode,
             )
-
-            for mode in ("dark", "light"):
-                page.click("#themeToggle")
-                page.wait_for_function(
-                    "mode => document.documentElement.getAttribute('data-bs-theme') === mode",
-                    arg=mode,
-                )
-                visited += 1
-
-        browser.close()
+            visited += 1
 
     assert visited == len(themes) * 2
 
 
-def test_active_pill_is_contrast_compliant(preview_url):
-    pytest.importorskip("playwright.sync_api")
-    from playwright.sync_api import Error, sync_playwright
-
-    threshold = float(os.environ.get("WCAG_AAA_NORMAL_MIN", "7.0"))
-    issues = []
-
-    contrast_for_selector_script = """
-    (selector) => {
-      function parseColor(raw) {
-        if (!raw || raw === 'transparent') return { r: 0, g: 0, b: 0, a: 0 };
-        const m = raw.match(/rgba?\\(([^)]+)\\)/i);
-        if (!m) return { r: 0, g: 0, b: 0, a: 0 };
-        const p = m[1].split(',').map(x => x.trim());
-        return {
-          r: Number(p[0]),
-          g: Number(p[1]),
-          b: Number(p[2]),
-          a: p[3] === undefined ? 1 : Number(p[3])
-        };
-      }
-
-      function blend(top, bottom) {
-        const a = top.a + bottom.a * (1 - top.a);
-        if (a <= 0) return { r: 0, g: 0, b: 0, a: 0 };
-        return {
-          r: (top.r * top.a + bottom.r * bottom.a * (1 - top.a)) / a,
-          g: (top.g * top.a + bottom.g * bottom.a * (1 - top.a)) / a,
-          b: (top.b * top.a + bottom.b * bottom.a * (1 - top.a)) / a,
-          a
-        };
-      }
-
-      function srgb(c) {
-        const v = c / 255;
-        return v <= 0.03928 ? v / 12.92 : Math.pow((v + 0.055) / 1.055, 2.4);
-      }
-
-      function luminance(color) {
-        return 0.2126 * srgb(color.r) + 0.7152 * srgb(color.g) + 0.0722 * srgb(color.b);
-      }
-
-      function contrastRatio(fg, bg) {
-        const l1 = luminance(fg);
-        const l2 = luminance(bg);
-        const light = Math.max(l1, l2);
-        const dark = Math.min(l1, l2);
-        return (light + 0.05) / (dark + 0.05);
-      }
-
-      function resolveBackground(el) {
-        let result = { r: 255, g: 255, b: 255, a: 1 };
-        let node = el;
-        const layers = [];
-        while (node) {
-          const c = parseColor(getComputedStyle(node).backgroundColor);
-          if (c.a > 0) layers.push(c);
-          node = node.parentElement;
+def test_style_settled_tracks_theme_changes(page):
+    """__styleSettled must drop on a theme switch and come back once the sheet is in."""
+    dropped = page.evaluate(
+        """
+        async () => {
+          const select = document.getElementById('themeSelect');
+          const next = [...select.options].find(o => o.value !== select.value);
+          select.value = next.value;
+          select.dispatchEvent(new Event('change'));
+          // MutationObserver callbacks are delivered before this continuation
+          await Promise.resolve();
+          return window.__styleSettled;
         }
-        for (let i = layers.length - 1; i >= 0; i -= 1) {
-          result = blend(layers[i], result);
+        """
+    )
+    assert dropped is False, "__styleSettled stayed true after a theme change"
+    page.wait_for_function("() => window.__styleSettled === true")
+
+
+def test_style_settles_after_back_to_back_theme_changes(page):
+    """A sheet replaced before it loads must not keep __styleSettled false."""
+    last = page.evaluate(
+        """
+        () => {
+          const select = document.getElementById('themeSelect');
+          const others = [...select.options].map(o => o.value).filter(v => v !== select.value);
+          const order = [others[0], others[1] ?? select.value];
+          for (const theme of order) {
+            select.value = theme;
+            select.dispatchEvent(new Event('change'));
+          }
+          return order[1];
         }
-        return result;
-      }
+        """
+    )
+    page.wait_for_function("() => window.__styleSettled === true", timeout=10_000)
+    href = page.get_attribute("#themeStylesheet", "href")
+    assert f"/{last}/theme.css" in href
 
-      const el = document.querySelector(selector);
-      if (!el) return null;
-      const style = getComputedStyle(el);
-      const fg = parseColor(style.color);
-      const bg = resolveBackground(el);
-      return Number(contrastRatio(fg, bg).toFixed(2));
-    }
-    """
 
-    with sync_playwright() as pw:
-        browser = None
-        try:
-            browser = pw.chromium.launch(channel="chromium", headless=True)
-        except Error:
-            try:
-                browser = pw.chromium.launch(headless=True)
-            except Error as exc:
-                pytest.skip(f"Chromium is not available for Playwright: {exc}")
+def test_active_pill_is_contrast_compliant(page):
+    threshold = float(os.environ.get("WCAG_AAA_NORMAL_MIN", "7.0"))
+    issues = []
 
-        if browser is None:
-            pytest.skip("Chromium is not available for Playwright")
-
-        page = browser.new_page(viewport={"width": 1440, "height": 2200})
-        page.goto(preview_url, wait_until="networkidle")
-        page.evaluate(
-            """
-            () => {
-              const opacityRange = document.getElementById('opacityRange');
-              if (opacityRange) {
-                opacityRange.value = opacityRange.max || '1';
-                opacityRange.dispatchEvent(new Event('input', { bubbles: true }));
-              }
-            }
-            """
-        )
-        page.evaluate(
-            """
-            () => {
-              const motion = document.createElement('style');
-              motion.id = 'test-disable-motion';
-              motion.innerHTML = '* { transition: none !important; animation: none !important; }';
-              document.head.appendChild(motion);
-            }
-            """
+    themes = page.eval_on_selector_all("#themeSelect option", "opts => opts.map(o => o.value)")
+    for theme in themes:
+        page.select_option("#themeSelect", theme)
+        page.wait_for_function(
+            "theme => document.getElementById('themeStylesheet').getAttribute('href').includes(`/` + theme + `/theme.css`)",
+            arg=theme,
         )
 
-        themes = page.eval_on_selector_all("#themeSelect option", "opts => opts.map(o => o.value)")
-        for theme in themes:
-            page.select_option("#themeSelect", theme)
+        for mode in ("light", "dark"):
+            page.evaluate(
+                """
+                (mode) => {
+                  document.documentElement.setAttribute('data-bs-theme', mode);
+                  if (typeof updateTheme === 'function') updateTheme();
+                }
+                """,
+                mode,
+            )
             page.wait_for_function(
-                "theme => document.getElementById('themeStylesheet').getAttribute('href').includes(`/` + theme + `/theme.css`)",
-                arg=theme,
+                "mode => document.documentElement.getAttribute('data-bs-theme') === mode",
+                arg=mode,
             )
-
-            for mode in ("light", "dark"):
-                page.evaluate(
-                    """
-                    (mode) => {
-                      document.documentElement.setAttribute('data-bs-theme', mode);
-                      if (typeof updateTheme === 'function') updateTheme();
-                    }
-                    """,
-                    mode,
-                )
-                page.wait_for_function(
-                    "mode => document.documentElement.getAttribute('data-bs-theme') === mode",
-                    arg=mode,
-                )
-                page.wait_for_timeout(180)
-                ratio = page.evaluate(contrast_for_selector_script, "#pills-home-tab")
-                if ratio is None:
-                    issues.append(f"{theme}/{mode}: #pills-home-tab not found")
-                elif ratio < threshold:
-                    issues.append(f"{theme}/{mode}: contrast {ratio} < {threshold}")
-
-        browser.close()
+            page.wait_for_function("() => window.__styleSettled === true")
+            ratio = page.evaluate("sel => window.__contrastFor(sel)", "#pills-home-tab")
+            if ratio is None:
+                issues.append(f"{theme}/{mode}: #pills-home-tab not found")
+            elif ratio < threshold:
+                issues.append(f"{theme}/{mode}: contrast {ratio} < {threshold}")
 
     assert not issues, "Active pill contrast failures:\n" + "\n".join(issues)
 
 
-def test_progress_bar_rendered_contrast(preview_url):
+def test_progress_bar_rendered_contrast(page):
     """Progress-bar fill must achieve >= 3.0 contrast against its track (WCAG 2.1 SC 1.4.11)."""
-    pytest.importorskip("playwright.sync_api")
-    from playwright.sync_api import Error, sync_playwright
-
     non_text_min = 3.0
     issues = []
 
-    progress_audit_script = """
-    (threshold) => {
-      function parseColor(raw) {
-        if (!raw || raw === 'transparent') return { r: 0, g: 0, b: 0, a: 0 };
-        const m = raw.match(/rgba?\\(([^)]+)\\)/i);
-        if (!m) return { r: 0, g: 0, b: 0, a: 0 };
-        const p = m[1].split(',').map(x => x.trim());
-        return {
-          r: Number(p[0]),
-          g: Number(p[1]),
-          b: Number(p[2]),
-          a: p[3] === undefined ? 1 : Number(p[3])
-        };
-      }
-
-      function blend(top, bottom) {
-        const a = top.a + bottom.a * (1 - top.a);
-        if (a <= 0) return { r: 0, g: 0, b: 0, a: 0 };
-        return {
-          r: (top.r * top.a + bottom.r * bottom.a * (1 - top.a)) / a,
-          g: (top.g * top.a + bottom.g * bottom.a * (1 - top.a)) / a,
-          b: (top.b * top.a + bottom.b * bottom.a * (1 - top.a)) / a,
-          a
-        };
-      }
-
-      function srgb(c) {
-        const v = c / 255;
-        return v <= 0.03928 ? v / 12.92 : Math.pow((v + 0.055) / 1.055, 2.4);
-      }
-
-      function luminance(color) {
-        return 0.2126 * srgb(color.r) + 0.7152 * srgb(color.g) + 0.0722 * srgb(color.b);
-      }
-
-      function contrastRatio(c1, c2) {
-        const l1 = luminance(c1);
-        const l2 = luminance(c2);
-        const light = Math.max(l1, l2);
-        const dark = Math.min(l1, l2);
-        return (light + 0.05) / (dark + 0.05);
-      }
-
-      function resolveBackground(el) {
-        let result = { r: 255, g: 255, b: 255, a: 1 };
-        const layers = [];
-        let node = el;
-        while (node) {
-          const c = parseColor(getComputedStyle(node).backgroundColor);
-          if (c.a > 0) layers.push(c);
-          node = node.parentElement;
-        }
-        for (let i = layers.length - 1; i >= 0; i--) {
-          result = blend(layers[i], result);
-        }
-        return result;
-      }
-
-      function barLabel(bar) {
-        const classes = Array.from(bar.classList)
-          .filter(c => c !== 'progress-bar' && c !== 'progress-bar-striped' && c !== 'progress-bar-animated')
-          .join('.');
-        return classes || 'default';
-      }
-
-      const failures = [];
-      const bars = document.querySelectorAll('.progress-bar');
-
-      for (const bar of bars) {
-        // Skip bg-light / bg-dark: inherently low-contrast in matching mode
-        if (bar.classList.contains('bg-light') || bar.classList.contains('bg-dark')) continue;
-
-        const rect = bar.getBoundingClientRect();
-        if (rect.width <= 0 || rect.height <= 0) continue;
-
-        const barBg = resolveBackground(bar);
-        const track = bar.closest('.progress');
-        if (!track) continue;
-        const trackBg = resolveBackground(track);
-
-        const ratio = contrastRatio(barBg, trackBg);
-        if (ratio < threshold) {
-          failures.push({
-            label: barLabel(bar),
-            ratio: Number(ratio.toFixed(2)),
-            barColor: `rgb(${Math.round(barBg.r)},${Math.round(barBg.g)},${Math.round(barBg.b)})`,
-            trackColor: `rgb(${Math.round(trackBg.r)},${Math.round(trackBg.g)},${Math.round(trackBg.b)})`
-          });
-        }
-      }
-
-      failures.sort((a, b) => a.ratio - b.ratio);
-      return failures;
-    }
-    """
-
-    with sync_playwright() as pw:
-        browser = None
-        try:
-            browser = pw.chromium.launch(channel="chromium", headless=True)
-        except Error:
-            try:
-                browser = pw.chromium.launch(headless=True)
-            except Error as exc:
-                pytest.skip(f"Chromium is not available for Playwright: {exc}")
-
-        if browser is None:
-            pytest.skip("Chromium is not available for Playwright")
-
-        page = browser.new_page(viewport={"width": 1440, "height": 2200})
-        page.goto(preview_url, wait_until="networkidle")
-        page.evaluate(
-            """
-            () => {
-              const opacityRange = document.getElementById('opacityRange');
-              if (opacityRange) {
-                opacityRange.value = opacityRange.max || '1';
-                opacityRange.dispatchEvent(new Event('input', { bubbles: true }));
-              }
-              const motion = document.createElement('style');
-              motion.id = 'test-disable-motion';
-              motion.innerHTML = '* { transition: none !important; animation: none !important; }';
-              document.head.appendChild(motion);
-              const style = document.createElement('style');
-              style.id = 'test-no-bg-image';
-              style.innerHTML = 'body::before { background-image: none !important; }';
-              document.head.appendChild(style);
-              if (typeof updateTheme === 'function') updateTheme();
-            }
-            """
+    themes = page.eval_on_selector_all(
+        "#themeSelect option", "opts => opts.map(o => o.value)"
+    )
+    for theme in themes:
+        page.select_option("#themeSelect", theme)
+        page.wait_for_function(
+            "theme => document.getElementById('themeStylesheet').getAttribute('href').includes(`/` + theme + `/theme.css`)",
+            arg=theme,
         )
 
-        themes = page.eval_on_selector_all(
-            "#themeSelect option", "opts => opts.map(o => o.value)"
-        )
-        for theme in themes:
-            page.select_option("#themeSelect", theme)
+        for mode in ("light", "dark"):
+            page.evaluate(
+                """
+                (mode) => {
+                  document.documentElement.setAttribute('data-bs-theme', mode);
+                  if (typeof updateTheme === 'function') updateTheme();
+                }
+                """,
+                mode,
+            )
             page.wait_for_function(
-                "theme => document.getElementById('themeStylesheet').getAttribute('href').includes(`/` + theme + `/theme.css`)",
-                arg=theme,
+                "mode => document.documentElement.getAttribute('data-bs-theme') === mode",
+                arg=mode,
             )
+            page.wait_for_function("() => window.__styleSettled === true")
 
-            for mode in ("light", "dark"):
-                page.evaluate(
-                    """
-                    (mode) => {
-                      document.documentElement.setAttribute('data-bs-theme', mode);
-                      if (typeof updateTheme === 'function') updateTheme();
-                    }
-                    """,
-                    mode,
-                )
-                page.wait_for_function(
-                    "mode => document.documentElement.getAttribute('data-bs-theme') === mode",
-                    arg=mode,
+            failures = page.evaluate("t => window.__progressAudit(t)", non_text_min)
+            if failures:
+                sample = "; ".join(
+                    f"{f['label']} {f['ratio']}<{non_text_min} "
+                    f"(bar={f['barColor']} track={f['trackColor']})"
+                    for f in failures[:5]
                 )
-                page.wait_for_timeout(180)
-
-                failures = page.evaluate(progress_audit_script, non_text_min)
-                if failures:
-                    sample = "; ".join(
-                        f"{f['label']} {f['ratio']}<{non_text_min} "
-                        f"(bar={f['barColor']} track={f['trackColor']})"
-                        for f in failures[:5]
-                    )
-                    issues.append(f"{theme}/{mode}: {sample}")
-
-        browser.close()
+                issues.append(f"{theme}/{mode}: {sample}")
 
     assert not issues, (
         "Progress bar contrast failures (non-text >= 3.0):\n" + "\n".join(issues)
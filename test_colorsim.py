@@ -0,0 +1,18 @@
+from PIL import Image
+
+import ColorSim
+
+
+def test_quantized_palette_is_clamped(monkeypatch):
+    """MMCQ can round a channel up to 256; quantize_palette must clamp it to a byte."""
+
+    class _Quantized:
+        palette = [(256, 240, 244), (-1, 0, 255)]
+
+    monkeypatch.setattr(ColorSim.MMCQ, "quantize", lambda pixels, count: _Quantized)
+    palette = ColorSim.quantize_palette(Image.new("RGB", (10, 10), (200, 100, 50)), 2)
+
+    assert palette == [(255, 240, 244), (0, 0, 255)]
+    # Both 256-entry lookup tables accept the clamped channels
+    assert ColorSim.rgb_to_hex(palette[0]) == "#fff0f4"
+    assert 0.0 <= ColorSim.get_luminance(palette[0]) <= 1.0